@@ -14,6 +14,95 @@ print_message () {
     echo -e "${left_filler_len// /$symbol}$message${right_filler_len// /$symbol}\033[0m"
 }
 
+usage () {
+    echo "Использование: $0 [-j N | --parallel [N]]" 1>&2
+    echo "  -j N, --parallel [N]  разбить тестовые файлы обоих проектов на N процессов" 1>&2
+    echo "                        (по умолчанию по числу ядер)" 1>&2
+}
+
+run_parallel () {
+    # Shard the test files of both projects round-robin across $1 worker
+    # processes. Every worker gets its own SQLite test database per project
+    # under .test_dbs/ and keeps it with --reuse-db, so the next run only
+    # applies new migrations instead of building the schema from scratch.
+    local workers=$1
+    local db_dir="$PWD/.test_dbs"
+    local log_dir
+    log_dir=$(mktemp -d)
+    mkdir -p "$db_dir"
+    local files=(ya_news/news/pytest_tests/test_*.py ya_note/notes/tests/test_*.py)
+    local pids=()
+    local worker
+    for ((worker = 0; worker < workers; worker++)); do
+        (
+            status=0
+            for project in ya_news ya_note; do
+                shard=()
+                for ((index = worker; index < ${#files[@]}; index += workers)); do
+                    if [[ ${files[$index]} == $project/* ]]; then
+                        shard+=("${files[$index]#$project/}")
+                    fi
+                done
+                if [[ ${#shard[@]} -eq 0 ]]; then
+                    continue
+                fi
+                settings=${SETTINGS[$project]}
+                if ! (cd "$project" \
+                      && DJANGO_SETTINGS_MODULE="$settings" \
+                         TEST_DATABASE_NAME="$db_dir/${project}_$worker.sqlite3" \
+                         pytest --tb=line --reuse-db "${shard[@]}");
+                then
+                    status=1
+                    echo "$project" >> "$log_dir/failed"
+                fi
+            done
+            exit $status
+        ) > "$log_dir/worker_$worker.log" 2>&1 &
+        pids+=($!)
+    done
+    local status=0
+    for ((worker = 0; worker < workers; worker++)); do
+        wait "${pids[$worker]}" || status=1
+        print_message " Процесс $((worker + 1)) из $workers " "-" 1>&2
+        cat "$log_dir/worker_$worker.log" 1>&2
+    done
+    if [[ -f "$log_dir/failed" ]]; then
+        if grep -qx ya_news "$log_dir/failed"; then
+            print_message " При запуске упали ваши тесты для проекта YaNews. Проверьте тесты этого проекта " "=" 1
+        fi
+        if grep -qx ya_note "$log_dir/failed"; then
+            print_message " При запуске упали ваши тесты для проекта YaNote. Проверьте тесты этого проекта " "=" 1
+        fi
+        echo \`\`\` 1>&2
+    fi
+    rm -rf "$log_dir"
+    return $status
+}
+
+declare -A SETTINGS=([ya_news]=yanews.settings [ya_note]=yanote.settings)
+workers=0
+while [[ $# -gt 0 ]]; do
+    case $1 in
+        -j|--parallel)
+            if [[ $2 =~ ^[0-9]+$ ]]; then
+                workers=$2
+                shift
+            else
+                workers=$(nproc)
+            fi
+            ;;
+        -h|--help)
+            usage
+            exit 0
+            ;;
+        *)
+            usage
+            exit 2
+            ;;
+    esac
+    shift
+done
+
 
 if python -m flake8 --config=setup.cfg 1>&2;
 then
@@ -21,6 +110,10 @@ then
     echo $LF 1>&2
     if python structure_test.py
     then
+        if [[ $workers -gt 0 ]]; then
+            run_parallel "$workers"
+            exit $?
+        fi
         cd ya_news
         export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanews.settings"}"
         if pytest --tb=line 1>&2;
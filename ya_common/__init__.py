@@ -0,0 +1,6 @@
+"""
+Код, общий для проектов ya_news и ya_note.
+
+Пакет лежит в корне репозитория; settings.py каждого проекта
+и пакет benchmarks проекта добавляют корень в sys.path.
+"""
@@ -0,0 +1 @@
+"""Общий код бенчмарков ya_news и ya_note."""
@@ -0,0 +1,108 @@
+"""
+WSGI против ASGI при большом числе одновременных медленных клиентов.
+
+Каждый режим запускается в отдельном процессе на своей тестовой базе:
+wsgi — синхронные представления за пулом из --threads потоков, как
+у gunicorn с gthread; asgi — те же представления под ASGIHandler;
+asgi-async — асинхронные представления (DJANGO_ASYNC_VIEWS=1).
+Клиент читает каждый ответ --delay секунд: под WSGI всё это время
+занят поток сервера, под ASGI ожидает только сам клиент.
+
+Сценарии и настройки задаёт benchmarks/bench_asgi.py проекта:
+main() получает его имя модуля, модуль настроек и функцию scenarios,
+которая наполняет базу и отдаёт тройки (имя, путь, cookie).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from . import harness
+
+MODES = {'wsgi': '0', 'asgi': '0', 'asgi-async': '1'}
+
+
+def serve(args, settings_module, scenarios):
+    """Прогон одного режима; результаты пишутся в args.output."""
+    harness.setup(settings_module)
+    from django.core.asgi import get_asgi_application
+    from django.core.wsgi import get_wsgi_application
+
+    results = {}
+    with harness.test_database():
+        for name, path, cookie in scenarios():
+            if args.mode == 'wsgi':
+                results[name] = harness.load_wsgi(
+                    get_wsgi_application(), path, cookie, args.clients,
+                    args.requests, args.threads, args.delay,
+                )
+            else:
+                results[name] = harness.load_asgi(
+                    get_asgi_application(), path, cookie, args.clients,
+                    args.requests, args.delay,
+                )
+    args.output.write_text(json.dumps(results, ensure_ascii=False))
+
+
+def run_mode(module, mode, args, directory):
+    output = directory / f'{mode}.json'
+    env = dict(
+        os.environ,
+        TEST_DATABASE_NAME=str(directory / f'{mode}.sqlite3'),
+        DJANGO_ASYNC_VIEWS=MODES[mode],
+    )
+    subprocess.run(
+        [
+            sys.executable, '-m', module,
+            '--mode', mode,
+            '--output', str(output),
+            '--clients', str(args.clients),
+            '--requests', str(args.requests),
+            '--threads', str(args.threads),
+            '--delay', str(args.delay),
+        ],
+        env=env,
+        check=True,
+    )
+    return json.loads(output.read_text())
+
+
+def main(module, settings_module, scenarios):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=100,
+                        help='Одновременных клиентов.')
+    parser.add_argument('--requests', type=int, default=10,
+                        help='Запросов подряд от каждого клиента.')
+    parser.add_argument('--threads', type=int, default=8,
+                        help='Потоков WSGI-сервера.')
+    parser.add_argument('--delay', type=float, default=0.02,
+                        help='Секунд на чтение ответа клиентом.')
+    parser.add_argument('--output', type=Path,
+                        help='Куда сохранить результаты в JSON.')
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        return serve(args, settings_module, scenarios)
+    with tempfile.TemporaryDirectory() as directory:
+        results = {
+            mode: run_mode(module, mode, args, Path(directory))
+            for mode in MODES
+        }
+    if args.output:
+        args.output.write_text(
+            json.dumps(results, ensure_ascii=False, indent=2) + '\n'
+        )
+    print(f'{"сценарий":24}' + ''.join(
+        f'{mode + " rps/p95":>24}' for mode in MODES
+    ))
+    for scenario in results['wsgi']:
+        print(f'{scenario:24}' + ''.join(
+            '{:>14.1f} {:>8.1f}'.format(
+                results[mode][scenario]['rps'],
+                results[mode][scenario]['p95_ms'],
+            ) + ('!' if results[mode][scenario]['errors'] else ' ')
+            for mode in MODES
+        ))
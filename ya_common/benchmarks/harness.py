@@ -0,0 +1,280 @@
+"""
+Общая часть нагрузочных бенчмарков.
+
+Запросы выполняются тестовым клиентом Django во временной тестовой
+базе. Для каждого сценария собираются задержки (p50/p95/p99), число
+SQL-запросов на запрос и пиковая память, выделенная за один запрос
+(tracemalloc, отдельным проходом, чтобы не искажать время).
+Результаты сохраняются в JSON и сравниваются с сохранённым базовым
+замером: рост времени больше допуска, рост памяти больше допуска или
+любой рост числа запросов считается регрессией.
+"""
+import argparse
+import asyncio
+import gc
+import io
+import json
+import math
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+import django
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def setup(settings_module):
+    """Настраивает Django так же, как manage.py."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Временная тестовая база: рабочие данные не затрагиваются."""
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment, teardown_test_environment
+    )
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(request, requests, warmup):
+    """Метрики сценария: request() выполняет один запрос и его проверку."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    for _ in range(warmup):
+        request()
+    latencies = []
+    queries = 0
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            request()
+            latencies.append(time.perf_counter() - started)
+        queries = max(queries, len(captured))
+    gc.collect()
+    tracemalloc.start()
+    peak = 0
+    for _ in range(min(requests, 10)):
+        tracemalloc.reset_peak()
+        request()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    result = {
+        f'p{percent}_ms': round(percentile(latencies, percent) * 1000, 3)
+        for percent in PERCENTILES
+    }
+    result['queries'] = queries
+    result['peak_memory_kib'] = round(peak / 1024, 1)
+    return result
+
+
+def load_result(latencies, seconds, statuses):
+    """Пропускная способность и задержки нагрузочного прогона."""
+    result = {'rps': round(len(latencies) / seconds, 1)}
+    result.update(
+        (f'p{percent}_ms', round(percentile(latencies, percent) * 1000, 3))
+        for percent in PERCENTILES
+    )
+    result['errors'] = sum(not status.startswith('2') for status in statuses)
+    return result
+
+
+def load_wsgi(application, path, cookie, clients, requests, threads, delay):
+    """
+    Нагрузка на WSGI-приложение, как на сервер с threads потоками.
+
+    clients клиентов шлют по requests запросов подряд; медленный
+    клиент читает ответ delay секунд и всё это время держит поток.
+    """
+    workers = threading.BoundedSemaphore(threads)
+    latencies, statuses = [], []
+
+    def client():
+        for _ in range(requests):
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': path,
+                'QUERY_STRING': '',
+                'SERVER_NAME': 'testserver',
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_COOKIE': cookie,
+                'wsgi.input': io.BytesIO(),
+                'wsgi.errors': sys.stderr,
+                'wsgi.url_scheme': 'http',
+            }
+            started = time.perf_counter()
+            with workers:
+                body = application(
+                    environ, lambda status, headers: statuses.append(status)
+                )
+                try:
+                    b''.join(body)
+                    time.sleep(delay)
+                finally:
+                    body.close()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return load_result(latencies, time.perf_counter() - started, statuses)
+
+
+def load_asgi(application, path, cookie, clients, requests, delay):
+    """
+    Та же нагрузка на ASGI-приложение в одном цикле событий.
+
+    Медленное чтение ответа — ожидание в send, поток не занят.
+    """
+    latencies, statuses = [], []
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'cookie', cookie.encode())],
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(str(message['status']))
+        elif not message.get('more_body'):
+            await asyncio.sleep(delay)
+
+    async def client():
+        for _ in range(requests):
+            started = time.perf_counter()
+            await application(dict(scope), receive, send)
+            latencies.append(time.perf_counter() - started)
+
+    async def main():
+        await asyncio.gather(*(client() for _ in range(clients)))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    return load_result(latencies, time.perf_counter() - started, statuses)
+
+
+def compare(results, baseline, tolerance):
+    """Список регрессий относительно базового замера."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['queries'] > base['queries']:
+            regressions.append(
+                f'{name}: {result["queries"]} запросов '
+                f'вместо {base["queries"]}'
+            )
+        for metric in ('p95_ms', 'peak_memory_kib'):
+            limit = base[metric] * (1 + tolerance)
+            if result[metric] > limit:
+                regressions.append(
+                    f'{name}: {metric} {result[metric]} '
+                    f'при базовом {base[metric]} (+{tolerance:.0%})'
+                )
+    return regressions
+
+
+def parse_args(description, baseline):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        '--requests', type=int, default=50,
+        help='Замеряемых запросов на сценарий.',
+    )
+    parser.add_argument(
+        '--warmup', type=int, default=5,
+        help='Запросов прогрева перед замером.',
+    )
+    parser.add_argument(
+        '--output', type=Path,
+        help='Куда сохранить результаты в JSON.',
+    )
+    parser.add_argument(
+        '--baseline', type=Path, default=baseline,
+        help='Базовый замер для сравнения.',
+    )
+    parser.add_argument(
+        '--tolerance', type=float, default=0.5,
+        help='Допустимый рост p95 и памяти, доля от базового.',
+    )
+    parser.add_argument(
+        '--save-baseline', action='store_true',
+        help='Записать результаты как новый базовый замер.',
+    )
+    parser.add_argument(
+        '--only', nargs='*',
+        help='Запустить только сценарии с этими именами.',
+    )
+    return parser.parse_args()
+
+
+def run(scenarios, args):
+    """
+    Выполняет сценарии и сравнивает с базовым замером.
+
+    scenarios — пары (имя, фабрика); фабрика готовит данные и
+    возвращает функцию одного запроса. Возвращает код выхода.
+    """
+    results = {}
+    for name, prepare in scenarios:
+        if args.only and name not in args.only:
+            continue
+        results[name] = measure(prepare(), args.requests, args.warmup)
+        print(name, json.dumps(results[name], ensure_ascii=False))
+    if args.output:
+        args.output.write_text(
+            json.dumps(results, ensure_ascii=False, indent=2) + '\n'
+        )
+    if args.save_baseline:
+        args.baseline.write_text(
+            json.dumps(results, ensure_ascii=False, indent=2) + '\n'
+        )
+        return 0
+    if not args.baseline.exists():
+        print(f'Базовый замер {args.baseline} не найден, сравнения нет.')
+        return 0
+    regressions = compare(
+        results, json.loads(args.baseline.read_text()), args.tolerance
+    )
+    for regression in regressions:
+        print('РЕГРЕССИЯ:', regression, file=sys.stderr)
+    return 1 if regressions else 0
@@ -0,0 +1,68 @@
+"""
+Сравнение профилей настроек: разработка против production.
+
+Запускает bench_views дважды в отдельных процессах — с настройками
+по умолчанию и с DJANGO_PROFILE=production — на файловой тестовой
+базе, чтобы было видно открытие соединения на каждый запрос, и
+печатает разницу p50 и числа запросов по сценариям. Запускается
+из каталога проекта через его benchmarks/bench_profiles.py.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROFILES = {
+    'development': {},
+    'production': {
+        'DJANGO_PROFILE': 'production',
+        'DJANGO_SECRET_KEY': 'benchmark',
+    },
+}
+
+
+def run_profile(name, overrides, directory, requests):
+    output = directory / f'{name}.json'
+    env = dict(
+        os.environ,
+        TEST_DATABASE_NAME=str(directory / f'{name}.sqlite3'),
+        DJANGO_CACHE_LOCATION=str(directory / f'{name}-cache'),
+        **overrides,
+    )
+    subprocess.run(
+        [
+            sys.executable, '-m', 'benchmarks.bench_views',
+            '--requests', str(requests),
+            '--output', str(output),
+            '--baseline', str(directory / 'missing.json'),
+        ],
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    return json.loads(output.read_text())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        results = {
+            name: run_profile(name, overrides, Path(directory), args.requests)
+            for name, overrides in PROFILES.items()
+        }
+    development, production = results['development'], results['production']
+    print(f'{"сценарий":32} {"p50, мс":^21} {"запросов"}')
+    for scenario, before in development.items():
+        after = production[scenario]
+        change = (after['p50_ms'] / before['p50_ms'] - 1) * 100
+        print(
+            f'{scenario:32} '
+            f'{before["p50_ms"]:6.2f} → {after["p50_ms"]:6.2f} '
+            f'({change:+.0f}%) '
+            f'{before["queries"]:3} → {after["queries"]:<3}'
+        )
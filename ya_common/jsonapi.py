@@ -0,0 +1,245 @@
+"""
+JSON API поверх values().
+
+ResourceView отдаёт модель списком с курсорной пагинацией, пачкой
+по ?ids= и по одному объекту. Ответы строятся из словарей values(),
+без создания объектов моделей, а ?fields= выбирает поля, поэтому
+лишние столбцы из базы не читаются. Запись идёт через ModelForm
+ресурса с теми же проверками и той же защитой CSRF, что и формы сайта.
+"""
+import json
+from http import HTTPStatus
+
+from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
+from django.db.models import F
+from django.forms.models import model_to_dict
+from django.http import HttpResponse, JsonResponse
+from django.views import generic
+
+from .pagination import CursorPaginator, InvalidCursor
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ApiError(Exception):
+    """Ошибка запроса: статус и сообщение для клиента."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def respond(data, status=HTTPStatus.OK):
+    return JsonResponse(
+        data, status=status, json_dumps_params={'ensure_ascii': False}
+    )
+
+
+class ResourceView(generic.View):
+    """
+    Ресурс JSON API.
+
+    Как у generic-представлений Django, данные задаются атрибутом
+    model или queryset либо переопределённым get_queryset(). fields
+    сопоставляет имени поля в API поле модели или выражение для
+    values(); list_fields — поля списка по умолчанию. Если в URL есть
+    lookup_field, представление работает с одним объектом.
+    """
+    model = None
+    queryset = None
+    fields = {}
+    list_fields = None
+    ordering = ('id',)
+    per_page = 50
+    max_per_page = 100
+    max_ids = 100
+    lookup_field = 'pk'
+    form_class = None
+    login_required = False
+
+    def get_queryset(self):
+        if self.queryset is not None:
+            return self.queryset.all()
+        if self.model is not None:
+            return self.model._default_manager.all()
+        raise ImproperlyConfigured(
+            f'{type(self).__name__} не задаёт model, queryset '
+            'или get_queryset().'
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            if not request.user.is_authenticated and (
+                self.login_required or request.method not in SAFE_METHODS
+            ):
+                raise ApiError(HTTPStatus.UNAUTHORIZED, 'Требуется вход.')
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            return respond({'error': error.message}, error.status)
+
+    @property
+    def lookup(self):
+        return self.kwargs.get(self.lookup_field)
+
+    def get_fields(self, default=None):
+        """Поля из ?fields=a,b в порядке запроса или default."""
+        requested = self.request.GET.get('fields')
+        if requested is None:
+            return tuple(default or self.fields)
+        names = tuple(dict.fromkeys(
+            name.strip() for name in requested.split(',') if name.strip()
+        ))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown or not names:
+            raise ApiError(
+                HTTPStatus.BAD_REQUEST,
+                'Неизвестные поля: {}.'.format(', '.join(unknown) or '—'),
+            )
+        return names
+
+    def values(self, queryset, names, extra=()):
+        """
+        Выборка полей API и служебных полей модели extra через values.
+
+        Возвращает queryset и функцию, убирающую из строк служебные
+        поля, которых клиент не просил.
+        """
+        plain, expressions = [], {}
+        for name in dict.fromkeys((*names, *extra)):
+            source = self.fields.get(name, name)
+            if source == name:
+                plain.append(name)
+            elif isinstance(source, str):
+                expressions[name] = F(source)
+            else:
+                expressions[name] = source
+        queryset = queryset.values(*plain, **expressions)
+        if set(extra) <= set(names):
+            return queryset, list
+        return queryset, lambda rows: [
+            {name: row[name] for name in names} for row in rows
+        ]
+
+    def get_limit(self):
+        limit = self.request.GET.get('limit')
+        if limit is None:
+            return self.per_page
+        if not limit.isdigit() or not 0 < int(limit) <= self.max_per_page:
+            raise ApiError(
+                HTTPStatus.BAD_REQUEST,
+                f'limit — число от 1 до {self.max_per_page}.',
+            )
+        return int(limit)
+
+    def get_page(self, names):
+        """Страница списка после курсора ?cursor=."""
+        queryset, clean = self.values(
+            self.get_queryset(),
+            names,
+            [field.lstrip('-') for field in self.ordering],
+        )
+        paginator = CursorPaginator(queryset, self.ordering, self.get_limit())
+        try:
+            page = paginator.page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise ApiError(HTTPStatus.BAD_REQUEST, 'Некорректный курсор.')
+        return {
+            'results': clean(page.object_list),
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+        }
+
+    def get_batch(self, names):
+        """Объекты по ?ids=1,2,3 в порядке ids, отсутствующие пропускаются."""
+        try:
+            ids = [int(value) for value in self.request.GET['ids'].split(',')]
+        except ValueError:
+            raise ApiError(
+                HTTPStatus.BAD_REQUEST, 'ids — числа через запятую.'
+            )
+        if len(ids) > self.max_ids:
+            raise ApiError(
+                HTTPStatus.BAD_REQUEST,
+                f'Не больше {self.max_ids} ids за запрос.',
+            )
+        queryset, clean = self.values(
+            self.get_queryset().filter(pk__in=ids), names, ('id',)
+        )
+        rows = {row['id']: row for row in queryset}
+        return {'results': clean(rows[pk] for pk in ids if pk in rows)}
+
+    def get_row(self, names, **lookup):
+        queryset, clean = self.values(
+            self.get_queryset().filter(**lookup), names
+        )
+        rows = list(queryset[:1])
+        if not rows:
+            raise ApiError(HTTPStatus.NOT_FOUND, 'Не найдено.')
+        return clean(rows)[0]
+
+    def get_object(self):
+        try:
+            return self.get_queryset().get(
+                **{self.lookup_field: self.lookup}
+            )
+        except ObjectDoesNotExist:
+            raise ApiError(HTTPStatus.NOT_FOUND, 'Не найдено.')
+
+    def read_json(self):
+        try:
+            data = json.loads(self.request.body)
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, 'Тело запроса — не JSON.')
+        if not isinstance(data, dict):
+            raise ApiError(HTTPStatus.BAD_REQUEST, 'Ожидается JSON-объект.')
+        return data
+
+    def perform_save(self, form):
+        """Сохраняет проверенную форму; ошибки можно добавить в форму."""
+        return form.save()
+
+    def save(self, form, status):
+        if form.is_valid():
+            obj = self.perform_save(form)
+            if not form.errors:
+                return respond(
+                    self.get_row(tuple(self.fields), pk=obj.pk), status
+                )
+        return respond(
+            {'errors': form.errors.get_json_data()}, HTTPStatus.BAD_REQUEST
+        )
+
+    def get(self, request, *args, **kwargs):
+        if self.lookup is not None:
+            return respond(self.get_row(
+                self.get_fields(), **{self.lookup_field: self.lookup}
+            ))
+        names = self.get_fields(self.list_fields)
+        if 'ids' in request.GET:
+            return respond(self.get_batch(names))
+        return respond(self.get_page(names))
+
+    def post(self, request, *args, **kwargs):
+        if self.lookup is not None or self.form_class is None:
+            return self.http_method_not_allowed(request, *args, **kwargs)
+        return self.save(
+            self.form_class(self.read_json()), HTTPStatus.CREATED
+        )
+
+    def patch(self, request, *args, **kwargs):
+        """Частичное изменение: недостающие поля формы берутся из объекта."""
+        if self.lookup is None or self.form_class is None:
+            return self.http_method_not_allowed(request, *args, **kwargs)
+        instance = self.get_object()
+        data = model_to_dict(instance, fields=self.form_class._meta.fields)
+        data.update(self.read_json())
+        return self.save(
+            self.form_class(data, instance=instance), HTTPStatus.OK
+        )
+
+    def delete(self, request, *args, **kwargs):
+        if self.lookup is None or self.form_class is None:
+            return self.http_method_not_allowed(request, *args, **kwargs)
+        self.get_object().delete()
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
@@ -0,0 +1,87 @@
+"""
+Потоковый разбор JSON-массива.
+
+json.load читает файл целиком; iter_json дочитывает поток кусками
+по read_size символов и отдаёт элементы массива по одному, так что
+память не зависит от размера файла. Ошибки разбора — ValueError.
+"""
+import json
+import re
+from functools import partial
+from json.decoder import WHITESPACE
+
+READ_SIZE = 64 * 1024
+
+# Хвост буфера, которым может продолжаться прочитанное число.
+NUMBER_TAIL = re.compile(r'[0-9.eE+-]*\Z')
+
+
+class JsonReader:
+    """
+    Текстовый поток, читаемый кусками по мере разбора JSON.
+
+    Разобранная часть буфера не вырезается после каждого токена:
+    позиция pos сдвигается, а буфер уплотняется только при дочитывании.
+    """
+
+    decoder = json.JSONDecoder()
+
+    def __init__(self, stream, read_size=READ_SIZE):
+        self.chunks = iter(partial(stream.read, read_size), '')
+        self.buffer = ''
+        self.pos = 0
+
+    def fill(self):
+        """Дочитывает кусок потока; False, если поток закончился."""
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Следующий непробельный символ или '' в конце потока."""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def take(self):
+        char = self.peek()
+        self.pos += len(char)
+        return char
+
+    def value(self):
+        """Следующее JSON-значение целиком, дочитывая поток при нужде."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise ValueError('Некорректный JSON.') from None
+                continue
+            # Число в конце буфера может продолжаться в следующем куске.
+            if NUMBER_TAIL.match(self.buffer, end) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json(stream, read_size=READ_SIZE):
+    """Элементы JSON-массива из текстового потока по одному."""
+    reader = JsonReader(stream, read_size)
+    if reader.take() != '[':
+        raise ValueError('Файл не является JSON-массивом.')
+    if reader.peek() == ']':
+        reader.take()
+    else:
+        separator = ','
+        while separator == ',':
+            yield reader.value()
+            separator = reader.take()
+        if separator != ']':
+            raise ValueError('Некорректный JSON.')
+    if reader.peek():
+        raise ValueError('Лишние данные после JSON-массива.')
@@ -0,0 +1,139 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorPage:
+    """Страница курсорной пагинации."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator:
+    """
+    Keyset-пагинация по полям сортировки.
+
+    Вместо OFFSET страница начинается с условия на значения ключа
+    последней показанной записи, поэтому глубокие страницы стоят
+    столько же, сколько первая. Последнее поле ordering должно быть
+    уникальным (обычно id), поля не должны принимать значение NULL.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+
+    @staticmethod
+    def _field_name(field):
+        return field.lstrip('-')
+
+    def encode_cursor(self, obj, reverse=False):
+        """
+        Непрозрачный токен с позицией объекта и направлением.
+
+        obj — объект модели или словарь из values() с полями ordering.
+        """
+        names = [self._field_name(field) for field in self.ordering]
+        if isinstance(obj, dict):
+            position = [obj[name] for name in names]
+        else:
+            position = [getattr(obj, name) for name in names]
+        return self.encode_position(position, reverse)
+
+    def encode_position(self, position, reverse=False):
+        """Токен для значений полей ordering, не обязательно из базы."""
+        payload = json.dumps({'p': list(map(str, position)), 'r': reverse})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            position, reverse = payload['p'], payload['r']
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise InvalidCursor('Некорректный курсор.')
+        if len(position) != len(self.ordering):
+            raise InvalidCursor('Некорректный курсор.')
+        return position, bool(reverse)
+
+    def _after(self, position, reverse):
+        """
+        Условие «строго после позиции» в заданном направлении.
+
+        Одного OR по полям мало: SQLite не превращает его в диапазон
+        по индексу и читает индекс с начала. Поэтому перед OR стоит
+        нестрогая граница по первому полю, с которой начинается поиск.
+        """
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            descending = field.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            step = Q(**{
+                f'{self._field_name(field)}__{lookup}': position[index]
+            })
+            for previous, value in zip(self.ordering[:index], position):
+                step &= Q(**{self._field_name(previous): value})
+            condition |= step
+        if len(self.ordering) == 1:
+            return condition
+        first = self.ordering[0]
+        lookup = 'lte' if first.startswith('-') != reverse else 'gte'
+        bound = Q(**{f'{self._field_name(first)}__{lookup}': position[0]})
+        return bound & condition
+
+    def _reversed_ordering(self):
+        return tuple(
+            self._field_name(field) if field.startswith('-') else f'-{field}'
+            for field in self.ordering
+        )
+
+    def page(self, cursor=None):
+        """Возвращает страницу, начинающуюся после курсора."""
+        reverse = False
+        queryset = self.queryset
+        if cursor:
+            position, reverse = self.decode_cursor(cursor)
+            try:
+                queryset = queryset.filter(self._after(position, reverse))
+            except (ValidationError, ValueError, TypeError):
+                raise InvalidCursor('Некорректный курсор.')
+        ordering = self._reversed_ordering() if reverse else self.ordering
+        items = list(queryset.order_by(*ordering)[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if reverse:
+            items.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+        if not items:
+            return CursorPage(items)
+        return CursorPage(
+            items,
+            self.encode_cursor(items[-1]) if has_next else None,
+            self.encode_cursor(items[0], reverse=True)
+            if has_previous else None,
+        )
@@ -0,0 +1,114 @@
+"""
+Бюджет SQL-запросов для тестов.
+
+QueryBudget работает как контекстный менеджер и как декоратор, поэтому
+подходит и для pytest-django, и для django.test.TestCase. Он считает
+запросы, ищет N+1 (один и тот же «шаблон» SQL повторяется больше
+max_repeats раз) и, если задана переменная окружения
+QUERY_BUDGET_REPORT, дописывает результат в JSON-отчёт по имени вида.
+"""
+import json
+import os
+import re
+import time
+from collections import Counter
+from contextlib import ContextDecorator
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+MAX_REPEATS = 3
+REPORT_ENV = 'QUERY_BUDGET_REPORT'
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'IN \(\?(?:, \?)*\)')
+_SPACES = re.compile(r'\s+')
+
+
+def sql_shape(sql):
+    """SQL без литералов: запросы, отличающиеся только параметрами, равны."""
+    shape = _LITERALS.sub('?', sql)
+    shape = _IN_LISTS.sub('IN (...)', shape)
+    return _SPACES.sub(' ', shape).strip()
+
+
+class QueryBudget(ContextDecorator):
+    """Проверяет число запросов, повторы SQL и время выполнения."""
+
+    def __init__(
+        self,
+        name,
+        max_queries=None,
+        max_repeats=MAX_REPEATS,
+        max_seconds=None,
+        using=DEFAULT_DB_ALIAS,
+    ):
+        self.name = name
+        self.max_queries = max_queries
+        self.max_repeats = max_repeats
+        self.max_seconds = max_seconds
+        self.using = using
+
+    def __enter__(self):
+        self.capture = CaptureQueriesContext(connections[self.using])
+        self.capture.__enter__()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.elapsed = time.perf_counter() - self.started
+        self.capture.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return False
+        self.queries = [query['sql'] for query in self.capture]
+        self.repeated = {
+            shape: count
+            for shape, count in Counter(map(sql_shape, self.queries)).items()
+            if count > self.max_repeats
+        }
+        self.write_report()
+        self.check()
+        return False
+
+    def check(self):
+        errors = []
+        if self.max_queries is not None and (
+            len(self.queries) > self.max_queries
+        ):
+            errors.append(
+                f'{len(self.queries)} запросов при бюджете '
+                f'{self.max_queries}'
+            )
+        for shape, count in self.repeated.items():
+            errors.append(f'N+1: {count} повторов запроса {shape}')
+        if self.max_seconds is not None and self.elapsed > self.max_seconds:
+            errors.append(
+                f'{self.elapsed:.3f} с при бюджете {self.max_seconds} с'
+            )
+        if errors:
+            queries = '\n'.join(
+                f'{index}. {sql}'
+                for index, sql in enumerate(self.queries, start=1)
+            )
+            raise AssertionError(
+                f'{self.name}: ' + '; '.join(errors) + '\n' + queries
+            )
+
+    def write_report(self):
+        """Дописывает результат в JSON-отчёт, если он включён."""
+        path = os.environ.get(REPORT_ENV)
+        if not path:
+            return
+        try:
+            with open(path, encoding='utf-8') as file:
+                report = json.load(file)
+        except (FileNotFoundError, ValueError):
+            report = {}
+        report[self.name] = {
+            'queries': len(self.queries),
+            'max_queries': self.max_queries,
+            'seconds': round(self.elapsed, 6),
+            'repeated': self.repeated,
+        }
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
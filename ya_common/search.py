@@ -0,0 +1,311 @@
+"""
+Полнотекстовый поиск с русским стеммингом.
+
+Тексты разбиваются на слова и приводятся к основе стеммером Snowball
+для русского языка. На SQLite с FTS5 индекс хранится в виртуальной
+таблице (rowid = pk объекта), ранжирование — bm25. На остальных базах
+используется обратный индекс в модели терминов приложения (SearchTerm),
+где вес терма обратно пропорционален числу документов с ним. Оба
+индекса обновляются по одному объекту при сохранении и удалении;
+какой из них взять и как назвать таблицы, решает get_index()
+в search.py приложения.
+"""
+import re
+from functools import lru_cache
+
+from django.db import connection
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+
+VOWELS = 'аеиоуыэюя'
+WORD = re.compile(r'\w+')
+STEM_CACHE_SIZE = 100_000
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    (),
+    ('ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+     'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+     'ая', 'яя', 'ою', 'ею'),
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+     'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'),
+)
+NOUN = (
+    (),
+    ('а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+     'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+     'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+     'ья', 'я'),
+)
+SUPERLATIVE = ((), ('ейше', 'ейш'))
+DERIVATIONAL = ((), ('ость', 'ост'))
+
+
+def _endings(groups):
+    """Окончания группы от длинных к коротким с признаком «после а/я»."""
+    return sorted(
+        (
+            (ending, index == 0)
+            for index, group in enumerate(groups)
+            for ending in group
+        ),
+        key=lambda item: -len(item[0]),
+    )
+
+
+PERFECTIVE_GERUND, ADJECTIVE, PARTICIPLE, REFLEXIVE, VERB, NOUN = map(
+    _endings,
+    (PERFECTIVE_GERUND, ADJECTIVE, PARTICIPLE, REFLEXIVE, VERB, NOUN),
+)
+SUPERLATIVE, DERIVATIONAL = map(_endings, (SUPERLATIVE, DERIVATIONAL))
+
+
+def _strip(word, endings, start=0):
+    """
+    Снимает самое длинное окончание из endings, лежащее после start.
+
+    Возвращает None, если окончание не найдено.
+    """
+    for ending, after_a in endings:
+        if not word.endswith(ending):
+            continue
+        cut = len(word) - len(ending)
+        if cut < start:
+            continue
+        if after_a and (cut - 1 < start or word[cut - 1] not in 'ая'):
+            return None
+        return word[:cut]
+    return None
+
+
+def _region(word, start):
+    """Начало области после первого сочетания «гласная + согласная»."""
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem(word):
+    """
+    Основа русского слова по алгоритму Snowball.
+
+    Словарь текстов невелик по сравнению с их объёмом, поэтому основы
+    кэшируются: при массовой индексации стемминг почти не стоит.
+    """
+    word = word.lower().replace('ё', 'е')
+    rv = next(
+        (index + 1 for index, char in enumerate(word) if char in VOWELS),
+        len(word),
+    )
+    r2 = _region(word, _region(word, 0))
+
+    stripped = _strip(word, PERFECTIVE_GERUND, rv)
+    if stripped is None:
+        word = _strip(word, REFLEXIVE, rv) or word
+        stripped = _strip(word, ADJECTIVE, rv)
+        if stripped is not None:
+            stripped = _strip(stripped, PARTICIPLE, rv) or stripped
+        else:
+            stripped = _strip(word, VERB, rv)
+            if stripped is None:
+                stripped = _strip(word, NOUN, rv)
+    if stripped is not None:
+        word = stripped
+
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+    word = _strip(word, DERIVATIONAL, max(r2, rv)) or word
+    if word.endswith('нн') and len(word) - 2 >= rv:
+        word = word[:-1]
+    else:
+        superlative = _strip(word, SUPERLATIVE, rv)
+        if superlative is not None:
+            word = superlative
+            if word.endswith('нн') and len(word) - 2 >= rv:
+                word = word[:-1]
+        elif word.endswith('ь') and len(word) - 1 >= rv:
+            word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Основы слов текста в порядке появления."""
+    return [stem(word) for word in WORD.findall(text.lower())]
+
+
+@lru_cache(maxsize=None)
+def fts5_available():
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+class Fts5Index:
+    """Индекс в виртуальной таблице FTS5 с rowid = pk объекта."""
+
+    def __init__(self, table):
+        self.table = table
+
+    def update(self, pk, text, owner_id=None, created=False):
+        """Один INSERT OR REPLACE и для новой, и для изменённой записи."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {self.table} (rowid, doc, owner_id) '
+                'VALUES (%s, %s, %s)',
+                [pk, ' '.join(tokenize(text)), owner_id],
+            )
+
+    def add_many(self, documents):
+        """Индексирует новые объекты (pk, text, owner_id) одним запросом."""
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {self.table} (rowid, doc, owner_id) '
+                'VALUES (%s, %s, %s)',
+                [
+                    (pk, ' '.join(tokenize(text)), owner_id)
+                    for pk, text, owner_id in documents
+                ],
+            )
+
+    def remove(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [pk])
+
+    def remove_many(self, pks):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s',
+                [(pk,) for pk in pks],
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    def search(self, query, owner_id=None, limit=50):
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        # Владелец — индексируемая колонка внутри MATCH: FTS5 сам
+        # пересекает списки документов, а не фильтрует чужие после поиска.
+        match = 'doc : ({})'.format(
+            ' '.join('"{}"'.format(term) for term in terms)
+        )
+        if owner_id is not None:
+            match += ' AND owner_id : "{}"'.format(int(owner_id))
+        # Нулевой вес колонки owner_id: ранжирование только по тексту.
+        sql = (
+            f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s '
+            f'ORDER BY bm25({self.table}, 1.0, 0.0), rowid LIMIT %s'
+        )
+        params = [match, limit]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+class TermIndex:
+    """
+    Переносимый обратный индекс в таблице model.
+
+    model — модель с полями kind, object_id, owner_id, term и frequency
+    и атрибутом TERM_LENGTH, как SearchTerm в приложениях.
+    """
+
+    def __init__(self, model, kind):
+        self.model = model
+        self.kind = kind
+
+    def _entries(self, pk, text, owner_id):
+        frequencies = {}
+        for term in tokenize(text):
+            term = term[:self.model.TERM_LENGTH]
+            frequencies[term] = frequencies.get(term, 0) + 1
+        return (
+            self.model(
+                kind=self.kind,
+                object_id=pk,
+                owner_id=owner_id,
+                term=term,
+                frequency=frequency,
+            )
+            for term, frequency in frequencies.items()
+        )
+
+    def update(self, pk, text, owner_id=None, created=False):
+        if not created:
+            self.remove(pk)
+        self.model.objects.bulk_create(self._entries(pk, text, owner_id))
+
+    def add_many(self, documents):
+        """Индексирует новые объекты (pk, text, owner_id) одной вставкой."""
+        self.model.objects.bulk_create(
+            entry
+            for document in documents
+            for entry in self._entries(*document)
+        )
+
+    def remove(self, pk):
+        self.model.objects.filter(kind=self.kind, object_id=pk).delete()
+
+    def remove_many(self, pks):
+        """Удаляет термы пачками, не упираясь в лимит параметров SQL."""
+        pks = list(pks)
+        size = connection.ops.bulk_batch_size(['object_id'], pks) or 1
+        for start in range(0, len(pks), size):
+            self.model.objects.filter(
+                kind=self.kind, object_id__in=pks[start:start + size]
+            ).delete()
+
+    def clear(self):
+        self.model.objects.filter(kind=self.kind).delete()
+
+    def search(self, query, owner_id=None, limit=50):
+        terms = {term[:self.model.TERM_LENGTH] for term in tokenize(query)}
+        if not terms:
+            return []
+        entries = self.model.objects.filter(kind=self.kind, term__in=terms)
+        if owner_id is not None:
+            entries = entries.filter(owner_id=owner_id)
+        documents = dict(
+            entries.order_by().values_list('term').annotate(Count('id'))
+        )
+        if len(documents) < len(terms):
+            return []
+        weight = Case(
+            *(
+                When(term=term, then=Value(1 / count))
+                for term, count in documents.items()
+            ),
+            output_field=FloatField(),
+        )
+        return list(
+            entries.order_by().values('object_id').annotate(
+                matched=Count('term'),
+                score=Sum(F('frequency') * weight),
+            ).filter(matched=len(terms)).order_by(
+                '-score', 'object_id'
+            ).values_list('object_id', flat=True)[:limit]
+        )
+
+
+def ranked(queryset, ids):
+    """Объекты queryset в порядке ids, которые вернул индекс."""
+    objects = queryset.in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
@@ -0,0 +1,53 @@
+"""
+Очередь записи для SQLite.
+
+SQLite допускает одного писателя на базу. В режиме WAL читатели
+писателю не мешают, но параллельные записи из потоков одного
+процесса ждут друг друга внутри SQLite, а транзакция, начатая
+чтением, при попытке записи получает «database is locked» сразу,
+без ожидания busy_timeout. При SQLITE_WRITE_QUEUE запросы,
+меняющие данные, выстраиваются в очередь на блокировке процесса
+и доходят до SQLite по одному; GET и HEAD идут мимо очереди.
+
+configure_sqlite применяет settings.SQLITE_PRAGMAS к каждому новому
+соединению; приложения подключают его в AppConfig.ready().
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_write_lock = threading.Lock()
+
+
+@contextmanager
+def serialized_writes():
+    """Блок, в котором пишет только один поток процесса."""
+    with _write_lock:
+        yield
+
+
+class SerializedWritesMiddleware:
+    """Пропускает изменяющие запросы через очередь записи."""
+
+    def __init__(self, get_response):
+        if not settings.SQLITE_WRITE_QUEUE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method in SAFE_METHODS:
+            return self.get_response(request)
+        with serialized_writes():
+            return self.get_response(request)
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Применяет settings.SQLITE_PRAGMAS к новому соединению с SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
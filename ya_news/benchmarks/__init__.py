@@ -0,0 +1,12 @@
+"""
+Бенчмарки проекта; общий код — в ya_common.benchmarks.
+
+Бенчмарки запускаются до настройки Django, поэтому корень
+репозитория с пакетом ya_common добавляется в sys.path здесь.
+"""
+import sys
+from pathlib import Path
+
+ROOT = str(Path(__file__).resolve().parent.parent.parent)
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
@@ -0,0 +1,34 @@
+"""
+WSGI против ASGI на страницах YaNews (см. ya_common.benchmarks.asgi).
+
+Запуск из каталога ya_news:
+    python -m benchmarks.bench_asgi --clients 200
+"""
+from ya_common.benchmarks import asgi
+
+
+def scenarios():
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from django.urls import reverse
+
+    from news import seeding
+    from news.models import News
+
+    user = get_user_model().objects.create(username='bench')
+    seeder = seeding.Seeder()
+    seeding.generate(seeder, 100, 5, [user.pk])
+    seeder.finish()
+    client = Client()
+    client.force_login(user)
+    name = settings.SESSION_COOKIE_NAME
+    cookie = f'{name}={client.cookies[name].value}'
+    detail = reverse('news:detail', args=(News.objects.first().pk,))
+    yield 'news:home anonymous', reverse('news:home'), ''
+    yield 'news:detail anonymous', detail, ''
+    yield 'news:detail', detail, cookie
+
+
+if __name__ == '__main__':
+    asgi.main('benchmarks.bench_asgi', 'yanews.settings', scenarios)
@@ -0,0 +1,55 @@
+"""
+Сравнение поиска запрещённых слов: цикл с `in` против автомата.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.bench_bad_words --words 5000 --length 5000
+"""
+import argparse
+import random
+import string
+import timeit
+
+from news.moderation import BadWordMatcher
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщъыьэюя'
+
+
+def random_word(rng, length):
+    return ''.join(rng.choice(ALPHABET) for _ in range(length))
+
+
+def loop_search(words, text):
+    """Прежняя реализация CommentForm.clean_text."""
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--words', type=int, default=5000)
+    parser.add_argument('--length', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    rng = random.Random(0)
+    words = [random_word(rng, rng.randint(6, 12)) for _ in range(args.words)]
+    text = ''.join(
+        rng.choice(ALPHABET + string.whitespace[:1])
+        for _ in range(args.length)
+    )
+
+    build = timeit.timeit(lambda: BadWordMatcher(words), number=1)
+    matcher = BadWordMatcher(words)
+    loop = timeit.timeit(lambda: loop_search(words, text), number=args.repeat)
+    automaton = timeit.timeit(lambda: matcher.search(text), number=args.repeat)
+
+    print(f'слов: {args.words}, длина текста: {args.length}')
+    print(f'построение автомата: {build * 1000:.1f} мс')
+    print(f'цикл с in:  {loop / args.repeat * 1000:.3f} мс на текст')
+    print(f'автомат:    {automaton / args.repeat * 1000:.3f} мс на текст')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Нагрузочный бенчмарк страниц YaNews.
+
+Запуск из каталога ya_news:
+    python -m benchmarks.bench_views --output results.json
+Регрессия относительно benchmarks/baseline.json завершает запуск
+с кодом 1; --save-baseline обновляет базовый замер.
+"""
+import sys
+from http import HTTPStatus
+from pathlib import Path
+
+from ya_common.benchmarks import harness
+
+BASELINE = Path(__file__).with_name('baseline.json')
+COMMENT_COUNTS = (0, 100, 10_000)
+
+
+def scenarios():
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from django.urls import reverse
+
+    from news import seeding
+    from news.models import Comment, News
+
+    user = get_user_model().objects.create(username='bench')
+    seeder = seeding.Seeder()
+    seeding.generate(seeder, 100, 5, [user.pk])
+    news_ids = {}
+    for count in COMMENT_COUNTS:
+        news = News(title=f'{count} комментариев', text='текст',
+                    comment_count=count)
+        seeder.add(news)
+        news_ids[count] = news.pk
+        for number in range(count):
+            seeder.add(Comment(news_id=news.pk, author_id=user.pk,
+                               text=f'комментарий {number}'))
+    seeder.finish()
+
+    anonymous = Client()
+    client = Client()
+    client.force_login(user)
+
+    def get(client, url):
+        def request():
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK, response
+        return request
+
+    def post_comment():
+        url = reverse('news:detail', args=(news_ids[0],))
+        form = {'text': 'Новый комментарий'}
+
+        def request():
+            response = client.post(url, form)
+            assert response.status_code == HTTPStatus.FOUND, response
+        return request
+
+    def post_invalid_comment():
+        url = reverse('news:detail', args=(news_ids[100],))
+
+        def request():
+            response = client.post(url, {'text': ''})
+            assert response.status_code == HTTPStatus.OK, response
+        return request
+
+    yield 'news:home anonymous', lambda: get(anonymous, reverse('news:home'))
+    yield 'news:home', lambda: get(client, reverse('news:home'))
+    for count in COMMENT_COUNTS:
+        url = reverse('news:detail', args=(news_ids[count],))
+        yield f'news:detail {count} comments', (
+            lambda url=url: get(client, url)
+        )
+    yield 'news:api_news', lambda: get(anonymous, reverse('news:api_news'))
+    yield 'news:api_news_comments 100 comments', lambda: get(
+        anonymous, reverse('news:api_news_comments', args=(news_ids[100],))
+    )
+    yield 'news:detail post comment', post_comment
+    yield 'news:detail post invalid comment', post_invalid_comment
+
+
+def main():
+    args = harness.parse_args(__doc__, BASELINE)
+    harness.setup('yanews.settings')
+    with harness.test_database():
+        return harness.run(list(scenarios()), args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,48 @@
-from datetime import datetime, timedelta
+from datetime import timedelta
+from importlib import reload
 
 import pytest
+from asgiref.sync import async_to_sync
 from django.conf import settings
-from django.test import Client
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client, override_settings
 from django.utils import timezone
-from django.urls import reverse
+from django.urls import clear_url_caches, reverse
 
+from news import urls as news_urls
 from news.models import News, Comment
+from news.seeding import Seeder
+from yanews import urls as project_urls
+
+FEED_COMMENTS = 20
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Cached pages must not leak between tests."""
+    cache.clear()
+
+
+@pytest.fixture
+def async_request():
+    """Runs AsyncClient requests against URLs with the async views."""
+    def request(client, method, url, *args, **kwargs):
+        async def send():
+            return await getattr(client, method)(url, *args, **kwargs)
+        return async_to_sync(send)()
+
+    try:
+        with override_settings(ASYNC_VIEWS=True):
+            reload(news_urls)
+            reload(project_urls)
+            clear_url_caches()
+            yield request
+    finally:
+        reload(news_urls)
+        reload(project_urls)
+        clear_url_caches()
 
 
 @pytest.fixture
@@ -66,24 +102,77 @@ def comment_id(comment):
 
 
 @pytest.fixture
-def create_news():
-    news_list = [
-        News(title=f'News {index}',
-             text='text',
-             date=datetime.today() - timedelta(days=index))
-        for index in range(settings.NEWS_COUNT_ON_HOME_PAGE + 1)
-    ]
-    News.objects.bulk_create(news_list)
+def create_comments(another_user, news):
+    """Comments inserted newest first, so id order differs from time."""
+    now = timezone.now()
+    seeder = Seeder()
+    for index in range(7):
+        seeder.add(Comment(
+            news=news,
+            author=another_user,
+            text=f'text{index}',
+            created=now - timedelta(days=index),
+        ))
+    seeder.finish()
+    News.objects.filter(pk=news.pk).rebuild_comment_count()
+
+
+@pytest.fixture(scope='module')
+def module_db(django_db_setup, django_db_blocker):
+    """
+    Transaction around a test module, rolled back when it ends.
+
+    Module-scoped data is created inside it once; every test still
+    runs in its own savepoint and can't change that data for others.
+    Transactional tests (transaction=True) must not use it: their
+    flush would run inside this transaction and wipe the data.
+    """
+    with django_db_blocker.unblock():
+        atomic = transaction.atomic()
+        atomic.__enter__()
+    yield django_db_blocker
+    with django_db_blocker.unblock():
+        transaction.set_rollback(True)
+        atomic.__exit__(None, None, None)
+
+
+@pytest.fixture(scope='module')
+def news_feed(module_db):
+    """
+    One page of news plus one more, newest first, built in bulk.
+
+    The newest news has FEED_COMMENTS comments with spread out
+    timestamps inserted newest first.
+    """
+    with module_db.unblock():
+        commenter = get_user_model().objects.create(username='commenter')
+        today = timezone.localdate()
+        now = timezone.now()
+        seeder = Seeder()
+        feed = []
+        for index in range(settings.NEWS_COUNT_ON_HOME_PAGE + 1):
+            news = News(
+                title=f'News {index}',
+                text='text',
+                date=today - timedelta(days=index),
+                comment_count=0 if index else FEED_COMMENTS,
+            )
+            seeder.add(news)
+            feed.append(news)
+        for index in range(FEED_COMMENTS):
+            seeder.add(Comment(
+                news=feed[0],
+                author=commenter,
+                text=f'text{index}',
+                created=now - timedelta(hours=index),
+            ))
+        seeder.finish()
+    return feed
 
 
 @pytest.fixture
-def create_comments(another_user, news):
-    for index in range(7):
-        comment = Comment.objects.create(
-            news=news, author=another_user, text=f'text{index}'
-        )
-        comment.creates = timezone.now() + timedelta(days=index)
-        comment.save()
+def commented_news(news_feed):
+    return news_feed[0]
 
 
 @pytest.fixture
@@ -1,11 +1,47 @@
 from django.contrib import admin
+from django.contrib.admin.models import DELETION, LogEntry
+from django.contrib.admin.options import get_content_type_for_model
+from django.db import transaction
+from django.db.models.sql import DeleteQuery
+from django.forms.models import BaseInlineFormSet
+from django.urls import reverse
+from django.utils.html import format_html
 
-from .models import Comment, News
+from . import search
+from .models import BannedWord, Comment, News
+from .signals import comments_deleted
+
+
+class LatestCommentFormSet(BaseInlineFormSet):
+    """
+    Только последние limit комментариев новости.
+
+    У популярной новости тысячи комментариев, и форма для каждого
+    делала страницу новости в админке неподъёмной. Остальные
+    комментарии доступны в CommentAdmin.
+    """
+    limit = 20
+
+    def get_queryset(self):
+        if not hasattr(self, '_latest'):
+            self._latest = super().get_queryset().select_related(
+                'author'
+            ).order_by('-created', '-id')[:self.limit]
+        return self._latest
 
 
 class CommentInline(admin.StackedInline):
     model = Comment
+    formset = LatestCommentFormSet
     extra = 0
+    readonly_fields = ('author', 'created')
+    verbose_name_plural = (
+        f'Последние {LatestCommentFormSet.limit} комментариев'
+    )
+
+    def has_add_permission(self, request, obj=None):
+        """Автора в форме не выбрать, новые комментарии — в CommentAdmin."""
+        return False
 
 
 @admin.register(News)
@@ -13,3 +49,104 @@ class NewsAdmin(admin.ModelAdmin):
     inlines = [
         CommentInline,
     ]
+    readonly_fields = ('comment_count', 'all_comments')
+
+    @admin.display(description='Все комментарии')
+    def all_comments(self, obj):
+        if obj.pk is None:
+            return '—'
+        return format_html(
+            '<a href="{}?news__id__exact={}">{}</a>',
+            reverse('admin:news_comment_changelist'),
+            obj.pk,
+            obj.comment_count,
+        )
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    """
+    Комментарии для модерации.
+
+    Поиск идёт по индексу news.search, а не LIKE по тексту. Удаление
+    выбранных и одобрение выполняются одним запросом на все
+    комментарии, без загрузки и сигналов по каждому объекту.
+    """
+    list_display = ('__str__', 'news', 'author', 'created', 'approved')
+    list_select_related = ('news', 'author')
+    list_filter = ('approved',)
+    date_hierarchy = 'created'
+    # Поле нужно, чтобы админка показала строку поиска.
+    search_fields = ('text',)
+    search_limit = 1000
+    raw_id_fields = ('news', 'author')
+    actions = ('approve',)
+    # Не считать COUNT(*) по всей таблице на каждой странице.
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        """Первые search_limit совпадений по индексу комментариев."""
+        if not search_term:
+            return queryset, False
+        ids = search.get_index('comment').search(
+            search_term, limit=self.search_limit
+        )
+        return queryset.filter(pk__in=ids), False
+
+    @admin.action(description='Одобрить выбранные комментарии')
+    def approve(self, request, queryset):
+        approved = queryset.update(approved=True)
+        self.message_user(request, f'Одобрено комментариев: {approved}.')
+
+    def get_readonly_fields(self, request, obj=None):
+        """
+        Новость у существующего комментария не меняется.
+
+        Перенос комментария менял бы счётчики и кэш двух новостей
+        в обход сигналов удаления и создания.
+        """
+        readonly = super().get_readonly_fields(request, obj)
+        if obj is not None:
+            return (*readonly, 'news')
+        return readonly
+
+    def deletion_entry(self, request, obj):
+        return LogEntry(
+            user_id=request.user.pk,
+            content_type_id=get_content_type_for_model(obj).pk,
+            object_id=str(obj.pk),
+            object_repr=str(obj)[:200],
+            action_flag=DELETION,
+        )
+
+    def log_deletion(self, request, object, object_repr):
+        """Журнал удалений пишут delete_model и delete_queryset."""
+
+    def delete_model(self, request, obj):
+        entry = self.deletion_entry(request, obj)
+        super().delete_model(request, obj)
+        entry.save()
+
+    def delete_queryset(self, request, queryset):
+        """
+        Удаляет выбранные комментарии пачками DELETE без сигналов.
+
+        Счётчики, индекс поиска и кэш обновляет comments_deleted, как
+        и сигнал post_delete, но один раз на всё удаление; журнал
+        пишется одной вставкой.
+        """
+        with transaction.atomic(using=queryset.db):
+            comments = list(queryset.only('pk', 'news_id', 'text'))
+            pks = [comment.pk for comment in comments]
+            DeleteQuery(Comment).delete_batch(pks, queryset.db)
+            comments_deleted(
+                {comment.news_id for comment in comments}, pks
+            )
+            LogEntry.objects.bulk_create(
+                self.deletion_entry(request, comment) for comment in comments
+            )
+
+
+@admin.register(BannedWord)
+class BannedWordAdmin(admin.ModelAdmin):
+    search_fields = ('word',)
@@ -0,0 +1,70 @@
+"""JSON API новостей и комментариев для мобильного клиента."""
+from http import HTTPStatus
+
+from ya_common.jsonapi import ApiError, ResourceView
+
+from .forms import CommentForm
+from .models import Comment, News
+from .replica import ReplicaReadMixin
+
+
+class NewsResource(ReplicaReadMixin, ResourceView):
+    """Новости только для чтения; в списке нет текста новости."""
+    http_method_names = ['get', 'head', 'options']
+    fields = {
+        'id': 'id',
+        'title': 'title',
+        'text': 'text',
+        'date': 'date',
+        'comment_count': 'comment_count',
+    }
+    list_fields = ('id', 'title', 'date', 'comment_count')
+    model = News
+    ordering = News._meta.ordering
+
+
+class CommentResource(ReplicaReadMixin, ResourceView):
+    """
+    Комментарии: все или к новости news_pk.
+
+    Читать может любой, создавать — вошедший пользователь, менять
+    и удалять — только автор.
+    """
+    fields = {
+        'id': 'id',
+        'news_id': 'news_id',
+        'author_id': 'author_id',
+        'author_name': 'author__username',
+        'text': 'text',
+        'created': 'created',
+    }
+    model = Comment
+    ordering = Comment._meta.ordering
+    form_class = CommentForm
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if 'news_pk' in self.kwargs:
+            queryset = queryset.filter(news_id=self.kwargs['news_pk'])
+        if self.request.method in ('PATCH', 'DELETE'):
+            queryset = queryset.filter(author=self.request.user)
+        return queryset
+
+    def post(self, request, *args, **kwargs):
+        if 'news_pk' not in self.kwargs:
+            return self.http_method_not_allowed(request, *args, **kwargs)
+        return super().post(request, *args, **kwargs)
+
+    def perform_save(self, form):
+        """Новый комментарий привязывается к новости из URL и автору."""
+        comment = form.save(commit=False)
+        if comment.pk is not None:
+            comment.save()
+            return comment
+        news_id = self.kwargs['news_pk']
+        if not News.objects.filter(pk=news_id).exists():
+            raise ApiError(HTTPStatus.NOT_FOUND, 'Новость не найдена.')
+        comment.news_id = news_id
+        comment.author = self.request.user
+        comment.save()
+        return comment
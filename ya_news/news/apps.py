@@ -1,7 +1,17 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+from ya_common.sqlite import configure_sqlite
 
 
 class NewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'news'
     verbose_name = 'Новости'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        connection_created.connect(
+            configure_sqlite, dispatch_uid='ya_common.sqlite.configure_sqlite'
+        )
@@ -1,7 +1,8 @@
 from django.forms import ModelForm
 from django.core.exceptions import ValidationError
 
-from .models import Comment
+from .models import BannedWord, Comment
+from .moderation import CachedMatcher
 
 BAD_WORDS = (
     'редиска',
@@ -11,6 +12,17 @@ BAD_WORDS = (
 WARNING = 'Не ругайтесь!'
 
 
+def load_bad_words():
+    """Встроенный список плюс слова, добавленные через админку."""
+    return (
+        *BAD_WORDS,
+        *BannedWord.objects.values_list('word', flat=True),
+    )
+
+
+bad_words = CachedMatcher('news:banned-words-version', load_bad_words)
+
+
 class CommentForm(ModelForm):
 
     class Meta:
@@ -20,8 +32,6 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if bad_words.search(text):
+            raise ValidationError(WARNING)
         return text
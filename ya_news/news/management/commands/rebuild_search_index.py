@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news import search
+from news.models import Comment, News
+
+CHUNK_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс новостей и комментариев.'
+
+    def handle(self, *args, **options):
+        sources = (
+            ('news', News.objects.only('title', 'text'),
+             search.news_document),
+            ('comment', Comment.objects.only('text'),
+             lambda comment: comment.text),
+        )
+        for kind, queryset, document in sources:
+            index = search.get_index(kind)
+            with transaction.atomic():
+                index.clear()
+                total = 0
+                for obj in queryset.order_by().iterator(CHUNK_SIZE):
+                    index.update(obj.pk, document(obj), created=True)
+                    total += 1
+            self.stdout.write(
+                self.style.SUCCESS(f'{kind}: проиндексировано {total}')
+            )
@@ -0,0 +1,116 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection
+
+from news import page_cache, search, seeding
+from news.models import Comment, News, SearchTerm
+
+
+class Command(BaseCommand):
+    help = (
+        'Быстро наполняет базу новостями и комментариями из фикстур '
+        'или синтетическими данными, минуя save() и сигналы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'fixtures', nargs='*',
+            help='JSON-фикстуры в формате loaddata; без них данные '
+                 'генерируются. Объекты с уже занятыми pk пропускаются.',
+        )
+        parser.add_argument(
+            '--news', type=int, default=1000,
+            help='Сколько новостей сгенерировать.',
+        )
+        parser.add_argument(
+            '--comments-per-news', type=int, default=10,
+            help='Среднее число комментариев у новости.',
+        )
+        parser.add_argument(
+            '--users', type=int, default=50,
+            help='Сколько авторов комментариев использовать.',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Seed генератора: одинаковый seed даёт одинаковые данные.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=seeding.BATCH_SIZE,
+            help='Объектов в одной транзакции.',
+        )
+        parser.add_argument(
+            '--flush', action='store_true',
+            help='Удалить новости и комментарии перед загрузкой.',
+        )
+        parser.add_argument(
+            '--no-index', action='store_false', dest='index',
+            help='Не пополнять поисковый индекс '
+                 '(потом запустите rebuild_search_index).',
+        )
+
+    def flush(self):
+        """Очищает таблицы новостей и индекс со сбросом pk, как flush."""
+        for kind in ('news', 'comment'):
+            search.get_index(kind).clear()
+        tables = [
+            model._meta.db_table for model in (Comment, News, SearchTerm)
+        ]
+        connection.ops.execute_sql_flush(connection.ops.sql_flush(
+            no_style(), tables, reset_sequences=True
+        ))
+        cache.clear()
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            self.flush()
+        seeder = seeding.Seeder(
+            options['batch_size'],
+            options['index'],
+            skip_existing=bool(options['fixtures']),
+        )
+        started = time.perf_counter()
+        try:
+            if options['fixtures']:
+                self.load_fixtures(seeder, options['fixtures'])
+            else:
+                seeding.generate(
+                    seeder,
+                    options['news'],
+                    options['comments_per_news'],
+                    seeding.seed_users(seeder, options['users']),
+                    seed=options['seed'],
+                )
+            seeder.finish()
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        elapsed = time.perf_counter() - started
+        page_cache.invalidate(page_cache.LIST_VERSION)
+        for model, total in seeder.counts.items():
+            seconds = seeder.seconds[model] or elapsed
+            self.stdout.write(
+                f'{model._meta.label}: {total} строк, '
+                f'{total / seconds:.0f} строк/с'
+            )
+        total = sum(seeder.counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено {total} строк за {elapsed:.2f} с '
+            f'({total / elapsed:.0f} строк/с)'
+        ))
+
+    def load_fixtures(self, seeder, paths):
+        """
+        Фикстуры читаются потоком; счётчики пересчитываются в конце.
+
+        Ключи в фикстурах заданы явно, поэтому уже загруженные объекты
+        пропускаются, а не перезаписываются: обновить их — --flush.
+        """
+        for path in paths:
+            with open(path, encoding='utf-8') as stream:
+                for obj in seeding.iter_fixture(stream):
+                    seeder.add(obj)
+        seeder.flush()
+        if seeder.counts[Comment]:
+            News.objects.rebuild_comment_count()
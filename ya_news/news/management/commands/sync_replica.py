@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from news.replica import PRIMARY, REPLICA
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файл реплики '
+        '(DJANGO_REPLICA_NAME) для локальной проверки чтения из реплики.'
+    )
+
+    def handle(self, *args, **options):
+        primary, replica = connections[PRIMARY], connections[REPLICA]
+        if {primary.vendor, replica.vendor} != {'sqlite'}:
+            raise CommandError('Копирование поддерживается только для SQLite.')
+        if primary.settings_dict['NAME'] == replica.settings_dict['NAME']:
+            raise CommandError(
+                'Реплика не задана: укажите DJANGO_REPLICA_NAME.'
+            )
+        primary.ensure_connection()
+        replica.ensure_connection()
+        primary.connection.backup(replica.connection)
+        self.stdout.write(self.style.SUCCESS(
+            f'Реплика {replica.settings_dict["NAME"]} обновлена.'
+        ))
@@ -0,0 +1,60 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:51
+
+from django.db import migrations, models
+
+FTS_TABLES = ('news_search_news', 'news_search_comment')
+
+
+def fts5_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+def create_fts_tables(apps, schema_editor):
+    if not fts5_available(schema_editor.connection):
+        return
+    for table in FTS_TABLES:
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {table} '
+            'USING fts5(doc, owner_id UNINDEXED)'
+        )
+
+
+def drop_fts_tables(apps, schema_editor):
+    if not fts5_available(schema_editor.connection):
+        return
+    for table in FTS_TABLES:
+        schema_editor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_news_modified'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('owner_id', models.BigIntegerField(null=True)),
+                ('term', models.CharField(max_length=100)),
+                ('frequency', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['kind', 'term'], name='search_kind_term_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['kind', 'object_id'], name='search_kind_object_idx'),
+        ),
+        migrations.RunPython(create_fts_tables, drop_fts_tables),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='approved',
+            field=models.BooleanField(default=False, verbose_name='Проверен модератором'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created', 'id'], name='comment_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:06
+
+from django.db import migrations, models
+
+FTS_TABLES = ('news_search_news', 'news_search_comment')
+
+
+def fts5_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+def rebuild_fts_tables(owner_column):
+    def rebuild(apps, schema_editor):
+        if not fts5_available(schema_editor.connection):
+            return
+        for table in FTS_TABLES:
+            schema_editor.execute(f'ALTER TABLE {table} RENAME TO {table}_old')
+            schema_editor.execute(
+                f'CREATE VIRTUAL TABLE {table} '
+                f'USING fts5(doc, {owner_column})'
+            )
+            schema_editor.execute(
+                f'INSERT INTO {table}(rowid, doc, owner_id) '
+                f'SELECT rowid, doc, owner_id FROM {table}_old'
+            )
+            schema_editor.execute(f'DROP TABLE {table}_old')
+    return rebuild
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0008_comment_approved'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['kind', 'owner_id', 'term'], name='search_kind_owner_term_idx'),
+        ),
+        migrations.RunPython(
+            rebuild_fts_tables('owner_id'),
+            rebuild_fts_tables('owner_id UNINDEXED'),
+        ),
+    ]
@@ -2,15 +2,42 @@ from datetime import datetime
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+class NewsQuerySet(models.QuerySet):
+
+    def rebuild_comment_count(self, **changes):
+        """
+        Пересчитывает счётчик комментариев одним UPDATE.
+
+        changes — другие поля, которые нужно обновить тем же запросом.
+        """
+        counts = Comment.objects.filter(
+            news=OuterRef('pk')
+        ).order_by().values('news').annotate(
+            total=Count('pk')
+        ).values('total')
+        return self.update(
+            comment_count=Coalesce(Subquery(counts), 0), **changes
+        )
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    modified = models.DateTimeField(auto_now=True)
+
+    objects = NewsQuerySet.as_manager()
 
     class Meta:
-        ordering = ('-date',)
+        ordering = ('-date', '-id')
+        indexes = (
+            models.Index(fields=('date', 'id'), name='news_date_id_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
@@ -29,9 +56,54 @@ class Comment(models.Model):
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    approved = models.BooleanField('Проверен модератором', default=False)
 
     class Meta:
-        ordering = ('created',)
+        ordering = ('created', 'id')
+        indexes = (
+            models.Index(
+                fields=('news', 'created'), name='comment_news_created_idx'
+            ),
+            # Общий список комментариев в админке.
+            models.Index(
+                fields=('created', 'id'), name='comment_created_id_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+
+class BannedWord(models.Model):
+    word = models.CharField('Слово', max_length=100, unique=True)
+
+    class Meta:
+        ordering = ('word',)
+        verbose_name_plural = 'Запрещённые слова'
+        verbose_name = 'Запрещённое слово'
+
+    def __str__(self):
+        return self.word
+
+
+class SearchTerm(models.Model):
+    """Запись обратного индекса для баз без FTS5 (см. news.search)."""
+    TERM_LENGTH = 100
+
+    kind = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    owner_id = models.BigIntegerField(null=True)
+    term = models.CharField(max_length=TERM_LENGTH)
+    frequency = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('kind', 'term'), name='search_kind_term_idx'),
+            models.Index(
+                fields=('kind', 'owner_id', 'term'),
+                name='search_kind_owner_term_idx',
+            ),
+            models.Index(
+                fields=('kind', 'object_id'), name='search_kind_object_idx'
+            ),
+        )
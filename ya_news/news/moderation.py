@@ -0,0 +1,136 @@
+import time
+from collections import deque
+
+from django.core.cache import cache
+
+# Латинские буквы, которые в тексте выдают за кириллические.
+HOMOGLYPHS = str.maketrans({
+    'a': 'а',
+    'b': 'в',
+    'c': 'с',
+    'e': 'е',
+    'h': 'н',
+    'k': 'к',
+    'm': 'м',
+    'o': 'о',
+    'p': 'р',
+    't': 'т',
+    'x': 'х',
+    'y': 'у',
+    'ё': 'е',
+})
+
+
+def normalize(text, homoglyphs=True):
+    """Приводит текст к виду, в котором ищутся запрещённые слова."""
+    text = text.casefold()
+    if homoglyphs:
+        return text.translate(HOMOGLYPHS)
+    return text.replace('ё', 'е')
+
+
+class BadWordMatcher:
+    """
+    Поиск запрещённых слов автоматом Ахо — Корасик.
+
+    Автомат строится один раз по всему списку слов, после чего текст
+    просматривается за один проход независимо от длины списка.
+    С word_boundary=True совпадение засчитывается, только если слово
+    не является частью более длинного слова.
+    """
+
+    def __init__(self, words, word_boundary=False, homoglyphs=True):
+        self.word_boundary = word_boundary
+        self.homoglyphs = homoglyphs
+        self._goto = [{}]
+        self._fail = [0]
+        self._lengths = [()]
+        for word in words:
+            self._add(normalize(word, homoglyphs))
+        self._link()
+
+    def _add(self, word):
+        if not word:
+            return
+        node = 0
+        for char in word:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._lengths.append(())
+                self._goto[node][char] = child
+            node = child
+        if len(word) not in self._lengths[node]:
+            self._lengths[node] += (len(word),)
+
+    def _link(self):
+        """Строит суффиксные ссылки обходом бора в ширину."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[child] = fail
+                self._lengths[child] += self._lengths[fail]
+
+    def finditer(self, text):
+        """Позиции (start, end) совпадений в нормализованном тексте."""
+        text = normalize(text, self.homoglyphs)
+        goto, fail, lengths = self._goto, self._fail, self._lengths
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length in lengths[node]:
+                start, end = index - length + 1, index + 1
+                if self.word_boundary and (
+                    start > 0 and text[start - 1].isalnum()
+                    or end < len(text) and text[end].isalnum()
+                ):
+                    continue
+                yield start, end
+
+    def search(self, text):
+        """Есть ли в тексте хотя бы одно запрещённое слово."""
+        return next(self.finditer(text), None) is not None
+
+
+class CachedMatcher:
+    """
+    BadWordMatcher, закэшированный в процессе.
+
+    Версия списка слов хранится в кэше Django одним целым числом.
+    На каждый запрос читается только она, а автомат пересобирается
+    из load_words() лишь после смены версии.
+    """
+
+    def __init__(self, version_key, load_words, **options):
+        self.version_key = version_key
+        self.load_words = load_words
+        self.options = options
+        self._state = (None, None)
+
+    def get(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, time.time_ns(), None)
+            version = cache.get(self.version_key)
+        cached_version, matcher = self._state
+        if matcher is None or version != cached_version:
+            matcher = BadWordMatcher(self.load_words(), **self.options)
+            self._state = (version, matcher)
+        return matcher
+
+    def search(self, text):
+        return self.get().search(text)
+
+    def invalidate(self):
+        """Сообщает всем процессам, что список слов изменился."""
+        cache.set(self.version_key, time.time_ns(), None)
@@ -0,0 +1,146 @@
+import hashlib
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .replica import reads_from
+
+LIST_VERSION = 'list'
+
+
+def version_key(name):
+    return f'news:page-version:{name}'
+
+
+def get_versions(names):
+    """
+    Уже созданные версии страниц: словарь имя → версия.
+
+    Недостающие версии создаёт add_versions и только для страниц,
+    которые отрисовались: иначе запросы к несуществующим новостям
+    заполняли бы кэш вечными ключами и вытесняли из него нужные.
+    """
+    keys = {name: version_key(name) for name in names}
+    found = cache.get_many(keys.values())
+    return {name: found[key] for name, key in keys.items() if key in found}
+
+
+def add_versions(names, versions):
+    """
+    Создаёт недостающие версии и возвращает все версии по порядку.
+
+    None, если недостающую версию уже создал или сменил другой
+    запрос: отрисованная страница могла устареть, кэшировать её нельзя.
+    """
+    for name in names:
+        if name not in versions:
+            version = time.time_ns()
+            if not cache.add(version_key(name), version, None):
+                return None
+            versions[name] = version
+    return [versions[name] for name in names]
+
+
+def page_key(request, versions):
+    return 'news:page:{}:{}'.format(
+        ':'.join(map(str, versions)), request.get_full_path()
+    )
+
+
+def page_response(request, entry):
+    """Ответ из записи кэша, 304 при совпадении валидаторов."""
+    response = HttpResponse(
+        entry['content'], content_type=entry['content_type']
+    )
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    patch_vary_headers(response, ('Cookie',))
+    return get_conditional_response(
+        request,
+        etag=entry['etag'],
+        last_modified=entry['last_modified'],
+        response=response,
+    )
+
+
+def cached_response(request, names):
+    """Закэшированная страница или None; в базу не обращается."""
+    versions = get_versions(names)
+    if len(versions) < len(names):
+        return None
+    entry = cache.get(
+        page_key(request, [versions[name] for name in names])
+    )
+    if entry is None:
+        return None
+    return page_response(request, entry)
+
+
+def invalidate(*names):
+    """Новые версии делают все закэшированные копии страниц устаревшими."""
+    cache.set_many(
+        {version_key(name): time.time_ns() for name in names}, None
+    )
+
+
+class AnonymousPageCacheMixin:
+    """
+    Кэш готового HTML для анонимных GET-запросов.
+
+    Ключ страницы содержит версии из get_cache_versions(), поэтому
+    для сброса достаточно сменить версию (см. invalidate). Ответ
+    несёт ETag и Last-Modified и при совпадении отдаёт 304.
+    Пока версия моложе REPLICA_STICKY_SECONDS, страница строится
+    по основной базе: отстающая реплика попала бы в кэш надолго.
+    """
+
+    def get_cache_versions(self):
+        return (LIST_VERSION,)
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or (
+            request.user.is_authenticated
+        ):
+            return super().dispatch(request, *args, **kwargs)
+        names = self.get_cache_versions()
+        versions = get_versions(names)
+        entry = None
+        if len(versions) == len(names):
+            entry = cache.get(
+                page_key(request, [versions[name] for name in names])
+            )
+        if entry is None:
+            fresh = len(versions) < len(names) or (
+                time.time_ns() - max(versions.values())
+                < settings.REPLICA_STICKY_SECONDS * 10**9
+            )
+            with reads_from(replica=False) if fresh else nullcontext():
+                response = super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            entry = self.cache_entry(request, response, names, versions)
+        return page_response(request, entry)
+
+    def cache_entry(self, request, response, names, versions):
+        """Запись кэша по отрисованному ответу; сохраняется, если можно."""
+        if hasattr(response, 'render'):
+            response.render()
+        entry = {
+            'content': response.content,
+            'content_type': response['Content-Type'],
+            'etag': quote_etag(hashlib.md5(response.content).hexdigest()),
+            'last_modified': int(time.time()),
+        }
+        versions = add_versions(names, versions)
+        if versions is not None:
+            cache.set(
+                page_key(request, versions),
+                entry,
+                settings.NEWS_PAGE_CACHE_TIMEOUT,
+            )
+        return entry
@@ -0,0 +1,90 @@
+"""
+Оповещения внутри процесса о новых комментариях.
+
+Broker раздаёт оповещения подписчикам темы (id новости). Подписчик
+ждёт в цикле событий (ASGI), не занимая поток. Оповещение не несёт
+данных: проснувшийся подписчик сам читает новые комментарии из базы.
+Другие процессы оповещений не получают, поэтому ожидающие ещё
+и перечитывают базу раз в COMMENT_STREAM_POLL секунд.
+"""
+import asyncio
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+
+class Subscription:
+    """Подписка на одну тему; ждут её в цикле событий."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = False
+        self._wake = None
+
+    def notify(self):
+        with self._lock:
+            self._pending = True
+            wake, self._wake = self._wake, None
+        if wake is not None:
+            wake()
+
+    def _arm(self, wake):
+        """Запоминает, как разбудить; False, если оповещение уже пришло."""
+        with self._lock:
+            if self._pending:
+                return False
+            self._wake = wake
+            return True
+
+    def _consume(self):
+        with self._lock:
+            pending, self._pending, self._wake = self._pending, False, None
+        return pending
+
+    async def wait_async(self, timeout):
+        """Ждёт оповещения в цикле событий; True, если оно пришло."""
+        event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        if self._arm(partial(loop.call_soon_threadsafe, event.set)):
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._consume()
+
+
+class Broker:
+    """Подписчики по темам."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    @contextmanager
+    def subscribe(self, topic):
+        """
+        Подписка на время блока.
+
+        Подписываться нужно до чтения базы: тогда оповещение
+        о комментарии, записанном сразу после чтения, не теряется.
+        """
+        subscription = Subscription()
+        with self._lock:
+            self._subscriptions.setdefault(topic, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                subscriptions = self._subscriptions[topic]
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[topic]
+
+    def publish(self, topic):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(topic, ()))
+        for subscription in subscriptions:
+            subscription.notify()
+
+
+comments = Broker()
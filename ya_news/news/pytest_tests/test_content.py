@@ -1,12 +1,22 @@
+import asyncio
+from http import HTTPStatus
+
 import pytest
 from django.conf import settings as st
-from django.urls import reverse
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from ya_common.search import Fts5Index, TermIndex
 
+from news.admin import LatestCommentFormSet
 from news.forms import CommentForm
+from news.models import News, SearchTerm
 
 
 @pytest.mark.django_db
-@pytest.mark.usefixtures('create_news')
+@pytest.mark.usefixtures('news_feed')
 def test_news_count(client):
     """Home page availability."""
     response = client.get(reverse('news:home'))
@@ -15,7 +25,7 @@ def test_news_count(client):
 
 
 @pytest.mark.django_db
-@pytest.mark.usefixtures('create_news')
+@pytest.mark.usefixtures('news_feed')
 def test_news_order(client):
     """News order on home page - from newest to oldest."""
     response = client.get(reverse('news:home'))
@@ -26,17 +36,137 @@ def test_news_order(client):
     assert dates == sorted_dates
 
 
-@pytest.mark.usefixtures('create_comments')
-def test_comment_order(client, news_url):
+@pytest.mark.django_db
+def test_home_page_comment_count(
+    client, django_assert_num_queries, commented_news
+):
+    """Home page shows comment counter with a single query."""
+    with django_assert_num_queries(1):
+        response = client.get(reverse('news:home'))
+    counts = {
+        item.pk: item.comment_count
+        for item in response.context['object_list']
+    }
+    assert counts[commented_news.pk] == commented_news.comment_set.count()
+
+
+@pytest.mark.django_db
+def test_async_news_pages(
+    async_request, author, commented_news, django_assert_num_queries
+):
+    """Async views render the pages, cached ones without queries."""
+    home, detail = (
+        reverse('news:home'),
+        reverse('news:detail', args=(commented_news.pk,)),
+    )
+    assert asyncio.iscoroutinefunction(resolve(detail).func)
+    anonymous = AsyncClient()
+    response = async_request(anonymous, 'get', home)
+    assert commented_news in response.context['object_list']
+    async_request(anonymous, 'get', detail)
+    with django_assert_num_queries(0):
+        response = async_request(anonymous, 'get', detail)
+    assert response.status_code == HTTPStatus.OK
+    client = AsyncClient()
+    client.force_login(author)
+    response = async_request(client, 'get', detail)
+    assert response.context['news'] == commented_news
+    assert isinstance(response.context['form'], CommentForm)
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('news_feed')
+def test_news_cursor_pagination(client):
+    """Next/previous cursors walk the whole feed without overlaps."""
+    url = reverse('news:home')
+    first_page = client.get(url).context['cursor_page']
+    assert not first_page.has_previous()
+    assert first_page.has_next()
+    second_page = client.get(
+        url, {'cursor': first_page.next_cursor}
+    ).context['cursor_page']
+    assert not second_page.has_next()
+    assert len(first_page) + len(second_page) == st.NEWS_COUNT_ON_HOME_PAGE + 1
+    assert second_page.object_list[0].date < first_page.object_list[-1].date
+    back_page = client.get(
+        url, {'cursor': second_page.previous_cursor}
+    ).context['cursor_page']
+    assert back_page.object_list == first_page.object_list
+    assert not back_page.has_previous()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'name, page, table, expected',
+    (
+        ('news:home', 'cursor_page', 'news_news', 'news_date_id_idx (date<?)'),
+        (
+            'news:comments',
+            'comments',
+            'news_comment',
+            'comment_news_created_idx (news_id=? AND created>?)',
+        ),
+    ),
+)
+def test_cursor_page_seeks_index(
+    client, commented_news, settings, name, page, table, expected
+):
+    """Pages after a cursor start with an index search, not a scan."""
+    settings.COMMENTS_COUNT_ON_NEWS_PAGE = 3
+    args = (commented_news.pk,) if name == 'news:comments' else None
+    url = reverse(name, args=args)
+    cursor = client.get(url).context[page].next_cursor
+    with CaptureQueriesContext(connection) as context:
+        client.get(url, {'cursor': cursor})
+    [sql] = [
+        query['sql'] for query in context.captured_queries
+        if f'FROM "{table}"' in query['sql']
+    ]
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        plan = ' '.join(row[-1] for row in db_cursor.fetchall())
+    assert f'SEARCH {table} USING INDEX {expected}' in plan
+
+
+@pytest.mark.django_db
+def test_comment_order(client, commented_news):
     """Comments chronological order."""
-    response = client.get(news_url)
-    assert 'news' in response.context
-    comments = response.context['news'].comment_set.all()
+    response = client.get(reverse('news:detail', args=(commented_news.pk,)))
+    assert 'comments' in response.context
+    comments = response.context['comments']
     comments_dates = [comment.created for comment in comments]
     sorted_comment = sorted(comments_dates)
     assert comments_dates == sorted_comment
 
 
+@pytest.mark.django_db
+def test_comments_pagination(client, commented_news, settings):
+    """Detail page shows first comments, fragment returns the rest."""
+    settings.COMMENTS_COUNT_ON_NEWS_PAGE = 3
+    news = commented_news
+    news_url = reverse('news:detail', args=(news.id,))
+    first_page = client.get(news_url).context['comments']
+    assert len(first_page) == settings.COMMENTS_COUNT_ON_NEWS_PAGE
+    fragment_url = reverse('news:comments', args=(news.id,))
+    shown = list(first_page)
+    cursor = first_page.next_cursor
+    while cursor:
+        page = client.get(fragment_url, {'cursor': cursor}).context['comments']
+        shown.extend(page)
+        cursor = page.next_cursor
+    assert shown == list(news.comment_set.all())
+
+
+@pytest.mark.django_db
+def test_detail_page_queries_do_not_grow(
+    client, commented_news, settings, django_assert_num_queries
+):
+    """Detail page query count doesn't depend on comment count."""
+    settings.COMMENTS_COUNT_ON_NEWS_PAGE = 3
+    with django_assert_num_queries(2):
+        client.get(reverse('news:detail', args=(commented_news.pk,)))
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize(
     'users_client, expected_result',
@@ -52,3 +182,121 @@ def test_comment_form_availability(users_client, expected_result, news_url):
     assert result == expected_result
     if result:
         assert isinstance(response.context['form'], CommentForm)
+
+
+@pytest.mark.django_db
+def test_search_news_and_comments(client, comment):
+    """Search finds news and comments by other word forms."""
+    News.objects.create(title='Новости спорта', text='Футбольные матчи')
+    other = News.objects.create(title='Погода', text='Без новостей')
+    response = client.get(reverse('news:search'), {'q': 'новость'})
+    titles = [news.title for news in response.context['news_list']]
+    assert set(titles) == {'Новости спорта', other.title}
+    response = client.get(reverse('news:search'), {'q': 'comment'})
+    assert response.context['comments'] == [comment]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'index',
+    (Fts5Index('news_search_news'), TermIndex(SearchTerm, 'news')),
+    ids=('fts5', 'terms'),
+)
+def test_search_index(index):
+    """Both index backends stem, rank, filter by owner and forget."""
+    index.clear()
+    index.update(1, 'Красивые новости о новостях', owner_id=1, created=True)
+    index.update(2, 'Одна новость', owner_id=1, created=True)
+    index.update(3, 'Новости соседа', owner_id=2, created=True)
+    assert index.search('новостями', owner_id=1) == [1, 2]
+    assert index.search('красивая новость') == [1]
+    assert index.search('погода') == []
+    index.update(1, 'Погода', owner_id=1)
+    index.remove(2)
+    assert index.search('новость') == [3]
+    assert index.search('погоды') == [1]
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('news_feed')
+@pytest.mark.parametrize(
+    'query, fields',
+    (
+        ('', ['id', 'title', 'date', 'comment_count']),
+        ('?fields=title,id', ['title', 'id']),
+    ),
+)
+def test_api_news_fields(client, query, fields):
+    """News list ships the requested fields only, never text by default."""
+    response = client.get(reverse('news:api_news') + query)
+    assert response.status_code == HTTPStatus.OK
+    results = response.json()['results']
+    assert results
+    assert all(list(item) == fields for item in results)
+
+
+@pytest.mark.django_db
+def test_api_unknown_field(client):
+    """Unknown field names are rejected."""
+    response = client.get(reverse('news:api_news'), {'fields': 'id,secret'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_api_news_cursor_pagination(client, news_feed):
+    """Following next cursors walks all news in page order."""
+    url = reverse('news:api_news')
+    ids, cursor = [], None
+    while True:
+        params = {'limit': 4, 'fields': 'id'}
+        if cursor:
+            params['cursor'] = cursor
+        page = client.get(url, params).json()
+        ids += [item['id'] for item in page['results']]
+        cursor = page['next']
+        if cursor is None:
+            break
+    assert ids == list(News.objects.values_list('id', flat=True))
+    previous = client.get(url, {'cursor': page['previous']}).json()
+    assert previous['next'] is not None
+
+
+@pytest.mark.django_db
+def test_api_batch_by_ids(client, news_feed):
+    """Batch fetch keeps the requested order and skips missing ids."""
+    first, second = news_feed[0].pk, news_feed[1].pk
+    response = client.get(
+        reverse('news:api_news'), {'ids': f'{second},0,{first}'}
+    )
+    assert [item['id'] for item in response.json()['results']] == [
+        second, first
+    ]
+
+
+@pytest.mark.django_db
+def test_api_news_item(client, news):
+    """News item includes the text."""
+    response = client.get(reverse('news:api_news_item', args=(news.pk,)))
+    assert response.json()['text'] == news.text
+
+
+@pytest.mark.usefixtures('create_comments')
+def test_admin_comment_inline_is_capped(admin_client, news, monkeypatch):
+    """News change page shows only the latest comments."""
+    monkeypatch.setattr(LatestCommentFormSet, 'limit', 3)
+    response = admin_client.get(
+        reverse('admin:news_news_change', args=(news.pk,))
+    )
+    forms = response.context['inline_admin_formsets'][0].formset.forms
+    assert [form.instance for form in forms] == list(
+        news.comment_set.order_by('-created', '-id')[:3]
+    )
+
+
+@pytest.mark.usefixtures('create_comments')
+def test_admin_comment_search(admin_client, comment):
+    """Admin comment search uses the search index."""
+    response = admin_client.get(
+        reverse('admin:news_comment_changelist'), {'q': 'comment'}
+    )
+    assert list(response.context['cl'].result_list) == [comment]
@@ -1,14 +1,34 @@
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from http import HTTPStatus
+from io import StringIO
+from urllib.parse import urlencode
 
 import pytest
+from django.contrib.admin.models import DELETION, LogEntry
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import AsyncClient, Client
 from django.urls import reverse
+from django.utils import timezone
 from pytest_django.asserts import (
     assertFormError,
     assertRedirects
 )
 
-from news.models import Comment
+from ya_common.jsonapi import ResourceView
+
+from news import page_cache, search, seeding
+from news.models import BannedWord, Comment, News
 from news.forms import BAD_WORDS, WARNING
+from news.moderation import BadWordMatcher
+from news.replica import REPLICA, STICKY_COOKIE
+from news.views import CommentPageMixin
 
 
 @pytest.mark.django_db
@@ -35,6 +55,24 @@ def test_user_can_create_comment(
     assert comment.text == edit_comment_form['text']
     assert comment.news == news
     assert comment.author == another_user
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+@pytest.mark.django_db
+def test_async_comment(async_request, author, news_url):
+    """Async detail view saves comments of logged in users only."""
+    # Django 3.2 AsyncClient can't send multipart, post urlencoded.
+    form = {'content_type': 'application/x-www-form-urlencoded'}
+    response = async_request(AsyncClient(), 'post', news_url, 'text=x', **form)
+    assert response.url.startswith(reverse('users:login'))
+    client = AsyncClient()
+    client.force_login(author)
+    response = async_request(client, 'post', news_url, 'text=async', **form)
+    assertRedirects(
+        response, f'{news_url}#comments', fetch_redirect_response=False
+    )
+    assert list(Comment.objects.values_list('text', flat=True)) == ['async']
 
 
 @pytest.mark.django_db
@@ -49,12 +87,55 @@ def test_user_cant_use_bad_words(news_url, another_user_client, word):
     assert Comment.objects.count() == 0
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'text', ('Ты РЕДИСКА!', 'рeдиcка', 'негодяйка')
+)
+def test_bad_words_evasion(news_url, another_user_client, text):
+    """Case, Latin homoglyphs and inflections don't hide bad words."""
+    response = another_user_client.post(news_url, data={'text': text})
+    assertFormError(response, form='form', field='text', errors=WARNING)
+    assert Comment.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_banned_words_from_database(
+    news_url, another_user_client, django_capture_on_commit_callbacks
+):
+    """Words added in admin are banned until they are removed."""
+    form = {'text': 'ты бяка'}
+    with django_capture_on_commit_callbacks(execute=True):
+        word = BannedWord.objects.create(word='бяка')
+    response = another_user_client.post(news_url, data=form)
+    assertFormError(response, form='form', field='text', errors=WARNING)
+    with django_capture_on_commit_callbacks(execute=True):
+        word.delete()
+    another_user_client.post(news_url, data=form)
+    assert Comment.objects.count() == 1
+
+
+@pytest.mark.parametrize(
+    'text, word_boundary, expected',
+    (
+        ('ежик', False, True),
+        ('ежик', True, False),
+        ('Ёж, привет', True, True),
+        ('уж', True, False),
+    ),
+)
+def test_bad_word_matcher(text, word_boundary, expected):
+    """Matcher normalizes ё and optionally respects word boundaries."""
+    matcher = BadWordMatcher(('ёж',), word_boundary=word_boundary)
+    assert matcher.search(text) is expected
+
+
 def test_author_can_delete_comment(author_client, comment_id, news_url):
     """User can delete his comment."""
     url = reverse('news:delete', args=comment_id)
     response = author_client.delete(url)
     assertRedirects(response, news_url + '#comments')
     assert Comment.objects.count() == 0
+    assert News.objects.get().comment_count == 0
 
 
 def test_user_cant_delete_comment_of_another_user(
@@ -94,3 +175,356 @@ def test_user_cant_edit_comment_of_another_user(
     assert response.status_code == HTTPStatus.NOT_FOUND
     comment.refresh_from_db()
     assert comment.text == old_text
+
+
+@pytest.mark.usefixtures('create_comments')
+def test_rebuild_comment_count(news):
+    """Management command restores comment counters."""
+    News.objects.update(comment_count=0)
+    call_command('rebuild_comment_count', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == Comment.objects.filter(news=news).count()
+
+
+@pytest.mark.django_db
+def test_seed_news_is_repeatable():
+    """Synthetic seed fills counters and index, same seed same data."""
+    options = {'news': 5, 'comments_per_news': 3, 'users': 2, 'seed': 7}
+    call_command('seed_news', stdout=StringIO(), **options)
+    titles = list(News.objects.values_list('id', 'title', 'comment_count'))
+    for news in News.objects.annotate(total=Count('comment')):
+        assert news.comment_count == news.total
+    comment = Comment.objects.first()
+    assert comment.pk in search.get_index('comment').search(comment.text)
+    call_command('seed_news', flush=True, stdout=StringIO(), **options)
+    assert list(
+        News.objects.values_list('id', 'title', 'comment_count')
+    ) == titles
+
+
+@pytest.mark.django_db
+def test_seed_news_from_fixture(settings):
+    """Fixture file is loaded like loaddata."""
+    call_command(
+        'seed_news', settings.BASE_DIR / 'news/fixtures/news.json',
+        stdout=StringIO()
+    )
+    assert News.objects.count() == 19
+
+
+@pytest.mark.django_db
+def test_seed_fixture_twice(tmp_path):
+    """Objects with existing pks are skipped on a second load."""
+    fixture = tmp_path / 'news.json'
+    fixture.write_text(
+        '[{"model": "news.news", "pk": 5, '
+        '"fields": {"title": "Пять", "text": "Текст"}}]'
+    )
+    for _ in range(2):
+        call_command('seed_news', fixture, stdout=StringIO())
+    assert list(News.objects.values_list('pk', flat=True)) == [5]
+
+
+@pytest.mark.django_db
+def test_seed_keeps_comment_dates(news, author):
+    """Seeded comments keep their dates, field state is not touched."""
+    created = timezone.now() - timedelta(days=3)
+    seeder = seeding.Seeder(index=False)
+    seeder.add(Comment(news=news, author=author, text='old', created=created))
+    seeder.finish()
+    assert Comment.objects.get().created == created
+    assert Comment._meta.get_field('created').auto_now_add
+
+
+@pytest.mark.django_db
+def test_cached_page_invalidated_by_comment(
+    client, news, news_url, author, django_capture_on_commit_callbacks
+):
+    """New comment appears on the cached anonymous page."""
+    client.get(news_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        Comment.objects.create(news=news, author=author, text='fresh')
+    assert 'fresh' in client.get(news_url).content.decode()
+
+
+@pytest.mark.django_db
+def test_missing_news_creates_no_cache_keys(client):
+    """Requests for news that don't exist leave nothing in the cache."""
+    cache.set(page_cache.version_key(page_cache.LIST_VERSION), 1)
+    for pk in range(1000, 1010):
+        response = client.get(reverse('news:detail', args=(pk,)))
+        assert response.status_code == HTTPStatus.NOT_FOUND
+    assert cache.get_many(
+        [page_cache.version_key(pk) for pk in range(1000, 1010)]
+    ) == {}
+
+
+@pytest.mark.django_db(databases=['default', REPLICA])
+def test_reads_from_replica_until_own_write(settings, author_client):
+    """Pages read the lagging replica, right after a post the primary."""
+    settings.REPLICA_READS = True
+    news = News.objects.create(title='primary', text='text')
+    News.objects.using(REPLICA).create(pk=news.pk, title='replica', text='')
+    url = reverse('news:detail', args=(news.pk,))
+    home = author_client.get(reverse('news:home'))
+    assert [item.title for item in home.context['object_list']] == [
+        'replica'
+    ]
+    assert author_client.get(url).context['news'].title == 'replica'
+    response = author_client.post(url, {'text': 'own comment'})
+    assert STICKY_COOKIE in response.cookies
+    response = author_client.get(url)
+    assert response.context['news'].title == 'primary'
+    assert 'own comment' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_sync_comment_stream(client, author_client, news, news_url):
+    """Without async views the page doesn't poll, stream answers at once."""
+    assert 'stream_cursor' not in author_client.get(news_url).context
+    cursor = CommentPageMixin().get_stream_cursor(news)
+    url = reverse('news:new_comments', args=(news.pk,))
+    started = time.monotonic()
+    response = client.get(url, {'cursor': cursor})
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    assert time.monotonic() - started < 1
+    author_client.post(news_url, {'text': 'fresh comment'})
+    data = client.get(url, {'cursor': cursor}).json()
+    assert 'fresh comment' in data['html']
+    response = client.get(url, {'cursor': data['cursor']})
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comment_stream_wakes_on_new_comment(
+    settings, async_request, author, news, news_url
+):
+    """Waiting stream request returns as soon as any comment is saved."""
+    settings.COMMENT_STREAM_TIMEOUT = settings.COMMENT_STREAM_POLL = 10
+    cursor = Client().get(news_url).context['stream_cursor']
+    url = '{}?{}'.format(
+        reverse('news:new_comments', args=(news.pk,)),
+        urlencode({'cursor': cursor}),
+    )
+
+    def wait():
+        try:
+            started = time.monotonic()
+            response = async_request(AsyncClient(), 'get', url)
+            return response, time.monotonic() - started
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(1) as executor:
+        waiting = executor.submit(wait)
+        time.sleep(0.2)
+        Comment.objects.create(news=news, author=author, text='pushed')
+        response, seconds = waiting.result()
+    assert 'pushed' in response.json()['html']
+    assert seconds < settings.COMMENT_STREAM_POLL
+
+
+@pytest.mark.django_db
+def test_async_comment_stream(settings, async_request, comment, news_url):
+    """Async stream view returns new comments as JSON."""
+    settings.COMMENT_STREAM_TIMEOUT = 0
+    cursor = Client().get(news_url).context['stream_cursor']
+    Comment.objects.create(
+        news=comment.news, author=comment.author, text='async stream'
+    )
+    # Django 3.2 AsyncClient drops GET data, the query goes into the URL.
+    url = '{}?{}'.format(
+        reverse('news:new_comments', args=(comment.news_id,)),
+        urlencode({'cursor': cursor}),
+    )
+    response = async_request(AsyncClient(), 'get', url)
+    assert 'async stream' in response.json()['html']
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize(
+    'write_queue, busy_timeout',
+    ((False, 5000), (True, 0)),
+    ids=('busy-timeout', 'write-queue'),
+)
+def test_concurrent_comments_and_reads(
+    settings, django_user_model, write_queue, busy_timeout
+):
+    """Threads post comments while others read, no «database is locked»."""
+    writers, readers, requests = 4, 4, 10
+    settings.SQLITE_WRITE_QUEUE = write_queue
+    settings.SQLITE_PRAGMAS = {
+        **settings.SQLITE_PRAGMAS, 'busy_timeout': busy_timeout
+    }
+    news = News.objects.create(title='title', text='text')
+    url = reverse('news:detail', args=(news.pk,))
+    clients = []
+    for number in range(writers + readers):
+        client = Client()
+        client.force_login(
+            django_user_model.objects.create(username=f'user{number}')
+        )
+        clients.append(client)
+
+    def post(client):
+        try:
+            return [
+                client.post(url, {'text': f'comment {number}'}).status_code
+                for number in range(requests)
+            ]
+        finally:
+            connection.close()
+
+    def get(client):
+        try:
+            return [client.get(url).status_code for _ in range(requests)]
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(writers + readers) as executor:
+        posts = executor.map(post, clients[:writers])
+        gets = executor.map(get, clients[writers:])
+        posts = [status for statuses in posts for status in statuses]
+        gets = [status for statuses in gets for status in statuses]
+    assert set(posts) == {HTTPStatus.FOUND}
+    assert set(gets) == {HTTPStatus.OK}
+    news.refresh_from_db()
+    assert news.comment_count == news.comment_set.count() == (
+        writers * requests
+    )
+
+
+def test_api_resource_needs_data():
+    """Resource without model, queryset or get_queryset is misconfigured."""
+    with pytest.raises(ImproperlyConfigured):
+        ResourceView().get_queryset()
+
+
+def test_api_create_comment(client, author_client, author, news):
+    """Only a logged in user can create a comment through the API."""
+    url = reverse('news:api_news_comments', args=(news.pk,))
+    data = {'text': 'api comment'}
+    response = client.post(url, data, content_type='application/json')
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    response = author_client.post(url, data, content_type='application/json')
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json()['author_name'] == author.username
+    comment = Comment.objects.get()
+    assert (comment.news, comment.author) == (news, author)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+def test_api_comment_bad_words(author_client, news):
+    """The API applies the same comment form checks."""
+    response = author_client.post(
+        reverse('news:api_news_comments', args=(news.pk,)),
+        {'text': f'Ты {BAD_WORDS[0]}'},
+        content_type='application/json',
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()['errors']['text'][0]['message'] == WARNING
+    assert Comment.objects.count() == 0
+
+
+def test_api_edit_and_delete_comment(
+    author_client, another_user_client, comment
+):
+    """Only the author can change or delete a comment."""
+    url = reverse('news:api_comment', args=(comment.pk,))
+    data = {'text': 'edited'}
+    for method in ('patch', 'delete'):
+        response = getattr(another_user_client, method)(
+            url, data, content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+    response = author_client.patch(url, data, content_type='application/json')
+    assert response.json()['text'] == 'edited'
+    response = author_client.delete(url)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    assert Comment.objects.count() == 0
+
+
+@pytest.mark.usefixtures('create_comments')
+def test_admin_bulk_delete_comments(admin_client, news):
+    """Bulk deletion keeps counters, search index and admin log right."""
+    deleted = list(Comment.objects.all()[:3])
+    response = admin_client.post(reverse('admin:news_comment_changelist'), {
+        'action': 'delete_selected',
+        '_selected_action': [comment.pk for comment in deleted],
+        'post': 'yes',
+    })
+    assert response.status_code == HTTPStatus.FOUND
+    news.refresh_from_db()
+    assert news.comment_count == Comment.objects.count() == 4
+    assert LogEntry.objects.filter(action_flag=DELETION).count() == 3
+    index = search.get_index('comment')
+    assert all(not index.search(comment.text) for comment in deleted)
+
+
+def test_admin_delete_all_comments_in_batches(admin_client, news, author):
+    """Deleting more comments than SQLite has parameters works."""
+    seeder = seeding.Seeder()
+    for index in range(1200):
+        seeder.add(Comment(news=news, author=author, text=f'text {index}'))
+    seeder.finish()
+    connection.ensure_connection()
+    limit = connection.connection.setlimit(
+        sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999
+    )
+    try:
+        response = admin_client.post(
+            reverse('admin:news_comment_changelist'),
+            {
+                'action': 'delete_selected',
+                'select_across': '1',
+                '_selected_action': [Comment.objects.first().pk],
+                'post': 'yes',
+            },
+        )
+    finally:
+        connection.connection.setlimit(
+            sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, limit
+        )
+    assert response.status_code == HTTPStatus.FOUND
+    news.refresh_from_db()
+    assert news.comment_count == Comment.objects.count() == 0
+    assert not search.get_index('comment').search('text')
+
+
+def test_admin_comment_keeps_news(admin_client, comment):
+    """Existing comment can't be moved to another news in admin."""
+    other = News.objects.create(title='other', text='text')
+    url = reverse('admin:news_comment_change', args=(comment.pk,))
+    admin_client.post(url, {
+        'news': other.pk,
+        'author': comment.author_id,
+        'text': 'moved',
+        'created_0': '2022-01-01',
+        'created_1': '00:00:00',
+    })
+    comment.refresh_from_db()
+    assert comment.news_id != other.pk
+    assert comment.text == 'moved'
+
+
+def test_admin_delete_comment(admin_client, comment):
+    """Single deletion in admin is logged once."""
+    admin_client.post(
+        reverse('admin:news_comment_delete', args=(comment.pk,)),
+        {'post': 'yes'},
+    )
+    assert not Comment.objects.exists()
+    assert LogEntry.objects.get(action_flag=DELETION).object_id == str(
+        comment.pk
+    )
+
+
+def test_admin_approve_comments(admin_client, comment):
+    """Approve action marks the selected comments as reviewed."""
+    admin_client.post(reverse('admin:news_comment_changelist'), {
+        'action': 'approve', '_selected_action': [comment.pk],
+    })
+    comment.refresh_from_db()
+    assert comment.approved
@@ -0,0 +1,139 @@
+import pytest
+from django.urls import reverse
+
+from ya_common.query_budget import QueryBudget
+
+from news.forms import bad_words
+from news.models import Comment
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'name, args, user_client, queries',
+    (
+        ('news:home', None, pytest.lazy_fixture('client'), 1),
+        ('news:detail', pytest.lazy_fixture('news_id'),
+         pytest.lazy_fixture('client'), 2),
+        ('news:detail', pytest.lazy_fixture('news_id'),
+         pytest.lazy_fixture('author_client'), 5),
+        ('news:comments', pytest.lazy_fixture('news_id'),
+         pytest.lazy_fixture('client'), 1),
+        ('news:edit', pytest.lazy_fixture('comment_id'),
+         pytest.lazy_fixture('author_client'), 3),
+        ('news:delete', pytest.lazy_fixture('comment_id'),
+         pytest.lazy_fixture('author_client'), 3),
+    ),
+)
+def test_get_query_budget(name, args, user_client, queries):
+    """Pages are rendered within their query budget."""
+    url = reverse(name, args=args)
+    with QueryBudget(f'GET {name}', queries):
+        user_client.get(url)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'name, args',
+    (
+        ('news:home', None),
+        ('news:detail', pytest.lazy_fixture('news_id')),
+    ),
+)
+def test_cached_page_query_budget(client, name, args):
+    """Cached anonymous pages are served without queries."""
+    url = reverse(name, args=args)
+    client.get(url)
+    with QueryBudget(f'GET {name} cached', 0):
+        client.get(url)
+
+
+def test_not_modified_query_budget(author_client, news_url):
+    """304 for a user costs session, user and one validator query."""
+    etag = author_client.get(news_url)['ETag']
+    with QueryBudget('GET news:detail 304', 3):
+        author_client.get(news_url, HTTP_IF_NONE_MATCH=etag)
+
+
+def test_create_comment_query_budget(
+    author_client, news_url, edit_comment_form
+):
+    """Comment creation: session, user, news, insert, counter, index."""
+    bad_words.get()
+    with QueryBudget('POST news:detail', 6):
+        author_client.post(news_url, data=edit_comment_form)
+
+
+def test_invalid_comment_query_budget(author_client, news_url):
+    """Rejected comment re-renders the page without extra news queries."""
+    bad_words.get()
+    with QueryBudget('POST news:detail invalid', 4):
+        author_client.post(news_url, data={'text': ''})
+
+
+def test_edit_comment_query_budget(
+    author_client, comment_id, edit_comment_form
+):
+    """Comment edit loads the comment once, touches news and index."""
+    bad_words.get()
+    url = reverse('news:edit', args=comment_id)
+    with QueryBudget('POST news:edit', 6):
+        author_client.post(url, data=edit_comment_form)
+
+
+def test_delete_comment_query_budget(author_client, comment_id):
+    """Comment deletion loads the comment once, updates news and index."""
+    url = reverse('news:delete', args=comment_id)
+    with QueryBudget('POST news:delete', 6):
+        author_client.post(url)
+
+
+@pytest.mark.usefixtures('create_comments')
+def test_n_plus_one_is_detected():
+    """Repeated queries of the same shape fail the budget."""
+    with pytest.raises(AssertionError, match='N\\+1'):
+        with QueryBudget('N+1', max_repeats=2):
+            for comment in Comment.objects.all():
+                comment.author.username
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('create_comments')
+@pytest.mark.parametrize(
+    'name, query',
+    (
+        ('news:api_news', {}),
+        ('news:api_news', {'ids': '1,2,3'}),
+        ('news:api_comments', {}),
+    ),
+)
+def test_api_list_query_budget(client, name, query):
+    """API lists are one query, author names included."""
+    url = reverse(name)
+    with QueryBudget(f'GET {name}', 1):
+        client.get(url, query)
+
+
+@pytest.mark.usefixtures('create_comments')
+def test_admin_bulk_delete_query_budget(admin_client):
+    """Bulk comment deletion doesn't grow with the number of comments."""
+    ids = list(Comment.objects.values_list('pk', flat=True))
+    with QueryBudget('POST admin delete comments', 13, max_repeats=2):
+        admin_client.post(reverse('admin:news_comment_changelist'), {
+            'action': 'delete_selected',
+            '_selected_action': ids,
+            'post': 'yes',
+        })
+
+
+@pytest.mark.usefixtures('create_comments')
+@pytest.mark.parametrize(
+    'name, args, queries',
+    (
+        ('admin:news_comment_changelist', None, 6),
+        ('admin:news_news_change', pytest.lazy_fixture('news_id'), 8),
+    ),
+)
+def test_admin_query_budget(admin_client, name, args, queries):
+    """Admin comment pages load comments with news and authors at once."""
+    with QueryBudget(f'GET {name}', queries, max_repeats=2):
+        admin_client.get(reverse(name, args=args))
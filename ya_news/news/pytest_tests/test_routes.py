@@ -4,6 +4,8 @@ import pytest
 from pytest_django.asserts import assertRedirects
 from django.urls import reverse
 
+from news.models import Comment
+
 
 @pytest.mark.django_db
 @pytest.mark.parametrize(
@@ -11,6 +13,7 @@ from django.urls import reverse
     (
         ('news:home', None),
         ('news:detail', pytest.lazy_fixture('news_id')),
+        ('news:comments', pytest.lazy_fixture('news_id')),
         ('users:signup', None),
         ('users:login', None),
         ('users:logout', None),
@@ -63,3 +66,38 @@ def test_comment_pages_for_anonymous_user(client, name, comment_id):
     expected_url = f'{login_url}?next={url}'
     response = client.get(url)
     assertRedirects(response, expected_url)
+
+
+@pytest.mark.django_db
+def test_home_page_invalid_cursor(client):
+    """Broken pagination cursor leads to 404."""
+    response = client.get(reverse('news:home'), {'cursor': 'broken'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'name, args',
+    (
+        ('news:home', None),
+        ('news:detail', pytest.lazy_fixture('news_id')),
+    ),
+)
+def test_not_modified_for_anonymous_user(client, name, args):
+    """Cached pages answer conditional requests with 304."""
+    url = reverse(name, args=args)
+    response = client.get(url)
+    assert response.has_header('ETag')
+    assert response.has_header('Last-Modified')
+    response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_not_modified_for_author(author_client, author, news, news_url):
+    """Detail page validator changes when comments change."""
+    etag = author_client.get(news_url)['ETag']
+    response = author_client.get(news_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    Comment.objects.create(news=news, author=author, text='text')
+    response = author_client.get(news_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
@@ -0,0 +1,96 @@
+"""
+Чтение новостей из реплики базы.
+
+Страницы только для чтения (ReplicaReadMixin) при REPLICA_READS
+читают модели приложения news из базы replica, всё остальное и любая
+запись идут в основную базу default. Реплика отстаёт от основной
+базы, поэтому после изменяющего запроса клиент получает короткую
+cookie, и пока она жива, его чтения тоже идут в основную базу:
+пользователь сразу видит собственный комментарий.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+REPLICA_APPS = ('news',)
+STICKY_COOKIE = 'news_primary'
+SAFE_METHODS = ('GET', 'HEAD')
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+@contextmanager
+def reads_from(replica):
+    """Блок, в котором чтение идёт в реплику (True) или в основную базу."""
+    token = _replica_reads.set(replica)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Роутер: чтение из реплики только внутри reads_from(True)."""
+
+    def db_for_read(self, model, **hints):
+        if (
+            settings.REPLICA_READS
+            and _replica_reads.get()
+            and model._meta.app_label in REPLICA_APPS
+        ):
+            return REPLICA
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        """
+        Запись всегда в основную базу.
+
+        Без явного ответа Django записал бы объект, прочитанный
+        из реплики, обратно в реплику.
+        """
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return {obj1._state.db, obj2._state.db} <= {PRIMARY, REPLICA}
+
+
+class ReplicaReadMixin:
+    """
+    Безопасные запросы представления читают из реплики.
+
+    Шаблон рендерится здесь же: ленивые queryset из контекста
+    выполняются при рендере и тоже должны попасть в реплику.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in SAFE_METHODS or (
+            STICKY_COOKIE in request.COOKIES
+        ):
+            return super().dispatch(request, *args, **kwargs)
+        with reads_from(replica=True):
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+        return response
+
+
+class StickyPrimaryMiddleware(MiddlewareMixin):
+    """
+    После изменяющего запроса чтения клиента идут в основную базу.
+
+    MiddlewareMixin работает и под WSGI, и под ASGI без обёрток.
+    """
+
+    def process_response(self, request, response):
+        if settings.REPLICA_READS and request.method not in SAFE_METHODS:
+            response.set_cookie(
+                STICKY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
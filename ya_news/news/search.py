@@ -0,0 +1,20 @@
+"""
+Поисковые индексы новостей и комментариев.
+
+Стемминг и оба вида индекса — в ya_common.search; здесь выбираются
+таблицы FTS5 приложения и модель SearchTerm.
+"""
+from ya_common.search import Fts5Index, TermIndex, fts5_available
+
+from .models import SearchTerm
+
+
+def get_index(kind):
+    """Индекс для объектов вида kind ('news', 'comment')."""
+    if fts5_available():
+        return Fts5Index(f'news_search_{kind}')
+    return TermIndex(SearchTerm, kind)
+
+
+def news_document(news):
+    return f'{news.title}\n{news.text}'
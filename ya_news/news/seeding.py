@@ -0,0 +1,216 @@
+"""
+Быстрое наполнение базы новостями и комментариями.
+
+В отличие от loaddata, который читает фикстуру целиком и сохраняет
+объекты по одному через save() с сигналами, Seeder копит объекты
+и вставляет их пачками через executemany. Первичные ключи назначаются
+заранее, поэтому комментарии ссылаются на новости без лишних
+запросов, а поисковый индекс пополняется той же пачкой. Фикстуры
+разбираются потоково, синтетические данные строятся генератором
+с фиксированным seed и одинаковы при каждом запуске.
+"""
+import random
+import time
+from collections import Counter
+from datetime import datetime, time as day_time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core import serializers
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from ya_common import jsonstream
+
+from . import search
+from .models import Comment, News
+
+BATCH_SIZE = 2000
+WORDS = (
+    'новость', 'город', 'жители', 'сообщили', 'сегодня', 'вчера', 'блог',
+    'популярность', 'интернет', 'погода', 'дождь', 'солнце', 'выставка',
+    'концерт', 'спорт', 'команда', 'победа', 'матч', 'школа', 'студенты',
+    'проект', 'запуск', 'компания', 'рынок', 'цены', 'транспорт', 'метро',
+    'дорога', 'парк', 'музей', 'книга', 'фильм', 'премьера', 'праздник',
+)
+
+
+def iter_fixture(stream):
+    """Объекты фикстуры в формате loaddata, по одному."""
+    for deserialized in serializers.deserialize(
+        'python', jsonstream.iter_json(stream)
+    ):
+        yield deserialized.object
+
+
+def insert_rows(model, objects, now):
+    """
+    Вставляет объекты одним executemany со значениями полей как есть.
+
+    bulk_create вызывает pre_save полей и перезаписал бы даты
+    auto_now_add текущим временем, а для реалистичных данных важны
+    исходные даты комментариев. Пустые поля auto_now и auto_now_add
+    получают время now.
+    """
+    fields = model._meta.concrete_fields
+    for field in fields:
+        if getattr(field, 'auto_now', False) or getattr(
+            field, 'auto_now_add', False
+        ):
+            for obj in objects:
+                if getattr(obj, field.attname) is None:
+                    setattr(obj, field.attname, now)
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [
+            [
+                field.get_db_prep_save(getattr(obj, field.attname), connection)
+                for field in fields
+            ]
+            for obj in objects
+        ])
+
+
+class Seeder:
+    """
+    Пакетная вставка объектов в обход save() и сигналов.
+
+    counts и seconds хранят по каждой модели число вставленных строк
+    и время их вставки вместе с индексацией. С skip_existing объекты,
+    чьи pk уже есть в базе, пропускаются: так повторная загрузка
+    фикстуры с явными pk не падает на дубликатах ключа.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, index=True,
+                 skip_existing=False):
+        self.batch_size = batch_size
+        self.skip_existing = skip_existing
+        self.buffers = {}
+        self.pending = 0
+        self.counts = Counter()
+        self.seconds = Counter()
+        self.next_ids = {}
+        self.indexes = {}
+        if index:
+            self.indexes = {
+                News: (search.get_index('news'), search.news_document),
+                Comment: (search.get_index('comment'), lambda obj: obj.text),
+            }
+
+    def next_id(self, model):
+        """Следующий свободный pk: ключи известны до вставки."""
+        if model not in self.next_ids:
+            last = model.objects.aggregate(last=Max('pk'))['last']
+            self.next_ids[model] = (last or 0) + 1
+        pk = self.next_ids[model]
+        self.next_ids[model] += 1
+        return pk
+
+    def add(self, obj):
+        model = type(obj)
+        if obj.pk is None:
+            obj.pk = self.next_id(model)
+        self.buffers.setdefault(model, []).append(obj)
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def new_objects(self, model, objects):
+        """Объекты, чьих pk ещё нет в базе."""
+        existing = set(model.objects.filter(
+            pk__in=[obj.pk for obj in objects]
+        ).values_list('pk', flat=True))
+        return [obj for obj in objects if obj.pk not in existing]
+
+    def flush(self):
+        """
+        Вставляет накопленные объекты в одной транзакции.
+
+        Модели вставляются в порядке первого появления, поэтому
+        новости попадают в базу раньше ссылающихся на них комментариев.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            for model, objects in self.buffers.items():
+                started = time.perf_counter()
+                if self.skip_existing:
+                    objects = self.new_objects(model, objects)
+                insert_rows(model, objects, now)
+                if model in self.indexes:
+                    index, document = self.indexes[model]
+                    index.add_many(
+                        (obj.pk, document(obj), None) for obj in objects
+                    )
+                self.counts[model] += len(objects)
+                self.seconds[model] += time.perf_counter() - started
+        self.buffers = {}
+        self.pending = 0
+
+    def finish(self):
+        """Дописывает остаток и сдвигает последовательности pk."""
+        self.flush()
+        models = list(self.counts)
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+
+def seed_users(seeder, count):
+    """Ключи авторов комментариев; недостающие создаются."""
+    User = get_user_model()
+    names = [f'seed-user-{number}' for number in range(count)]
+    existing = dict(
+        User.objects.filter(username__in=names).values_list('username', 'pk')
+    )
+    password = make_password(None)
+    ids = []
+    for name in names:
+        if name not in existing:
+            user = User(username=name, password=password)
+            seeder.add(user)
+            existing[name] = user.pk
+        ids.append(existing[name])
+    return ids
+
+
+def generate(seeder, news_count, comments_per_news, author_ids, seed=0):
+    """
+    Синтетические новости и комментарии; один seed — одни данные.
+
+    Число комментариев у новости случайно, в среднем
+    comments_per_news, и сразу записывается в comment_count.
+    """
+    rng = random.Random(seed)
+    today = timezone.localdate()
+
+    def sentence(words):
+        return ' '.join(rng.choices(WORDS, k=words)).capitalize()
+
+    for _ in range(news_count):
+        date = today - timedelta(days=rng.randrange(365))
+        comments = rng.randint(0, 2 * comments_per_news)
+        news = News(
+            title=sentence(rng.randint(2, 5))[:50],
+            text=sentence(rng.randint(20, 60)),
+            date=date,
+            comment_count=comments,
+        )
+        seeder.add(news)
+        created = timezone.make_aware(datetime.combine(date, day_time(8)))
+        for _ in range(comments):
+            created += timedelta(seconds=rng.randint(1, 3600))
+            seeder.add(Comment(
+                news_id=news.pk,
+                author_id=rng.choice(author_ids),
+                text=sentence(rng.randint(3, 20)),
+                created=created,
+            ))
@@ -0,0 +1,112 @@
+from functools import partial
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import page_cache, pubsub, search
+from .forms import bad_words
+from .models import BannedWord, Comment, News
+
+
+@receiver(post_save, sender=Comment)
+def update_news_on_comment_save(sender, instance, created, **kwargs):
+    """
+    Отмечаем изменение новости, новый комментарий увеличивает счётчик.
+
+    News.modified служит валидатором для условных GET-запросов.
+    """
+    changes = {'modified': timezone.now()}
+    if created:
+        changes['comment_count'] = F('comment_count') + 1
+    News.objects.filter(pk=instance.news_id).update(**changes)
+
+
+@receiver(post_save, sender=Comment)
+def publish_new_comment(sender, instance, created, **kwargs):
+    """
+    Будит ожидающие потоки комментариев новости после коммита.
+
+    Сигнал покрывает все пути создания: сайт, API и админку.
+    """
+    if created:
+        transaction.on_commit(
+            partial(pubsub.comments.publish, instance.news_id)
+        )
+
+
+def comments_deleted(news_ids, comment_ids):
+    """
+    Последствия удаления комментариев для новостей, индекса и кэша.
+
+    Счётчики и даты изменения новостей пересчитываются, комментарии
+    уходят из поискового индекса, кэш страниц сбрасывается после
+    коммита. Общая часть post_delete и массового удаления в админке.
+    """
+    news_ids = list(news_ids)
+    size = connection.ops.bulk_batch_size(['id'], news_ids) or 1
+    modified = timezone.now()
+    for start in range(0, len(news_ids), size):
+        News.objects.filter(
+            pk__in=news_ids[start:start + size]
+        ).rebuild_comment_count(modified=modified)
+    search.get_index('comment').remove_many(comment_ids)
+    transaction.on_commit(lambda: page_cache.invalidate(
+        page_cache.LIST_VERSION, *news_ids
+    ))
+
+
+@receiver(post_delete, sender=Comment)
+def update_news_on_comment_delete(sender, instance, **kwargs):
+    """Удалённый комментарий пересчитывает счётчик у новости."""
+    comments_deleted([instance.news_id], [instance.pk])
+
+
+@receiver(post_save, sender=BannedWord)
+@receiver(post_delete, sender=BannedWord)
+def invalidate_bad_words(sender, **kwargs):
+    """
+    Сбрасывает кэш автомата после коммита.
+
+    Если сменить версию раньше, другой процесс может пересобрать
+    автомат по ещё не закоммиченному списку и закэшировать его.
+    """
+    transaction.on_commit(bad_words.invalidate)
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def invalidate_news_pages(sender, instance, **kwargs):
+    """Сбрасывает кэш главной и страницы новости."""
+    transaction.on_commit(lambda: page_cache.invalidate(
+        page_cache.LIST_VERSION, instance.pk
+    ))
+
+
+@receiver(post_save, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    """Комментарии видны на странице новости, их число — на главной."""
+    transaction.on_commit(lambda: page_cache.invalidate(
+        page_cache.LIST_VERSION, instance.news_id
+    ))
+
+
+@receiver(post_save, sender=News)
+def index_news(sender, instance, created, **kwargs):
+    search.get_index('news').update(
+        instance.pk, search.news_document(instance), created=created
+    )
+
+
+@receiver(post_delete, sender=News)
+def unindex_news(sender, instance, **kwargs):
+    search.get_index('news').remove(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, created, **kwargs):
+    search.get_index('comment').update(
+        instance.pk, instance.text, created=created
+    )
@@ -1,16 +1,53 @@
+from django.conf import settings
 from django.urls import path
 
-from news import views
+from news import api, views
 
 app_name = 'news'
 
+if settings.ASYNC_VIEWS:
+    news_list, news_detail = views.news_list, views.news_detail
+    comment_stream = views.news_comment_stream
+else:
+    news_list = views.NewsList.as_view()
+    news_detail = views.NewsDetail.as_view()
+    comment_stream = views.NewsCommentStream.as_view()
+
 urlpatterns = [
-    path('', views.NewsList.as_view(), name='home'),
-    path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('', news_list, name='home'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('news/<int:pk>/', news_detail, name='detail'),
+    path(
+        'news/<int:pk>/comments/',
+        views.NewsCommentList.as_view(),
+        name='comments'
+    ),
+    path(
+        'news/<int:pk>/comments/new/',
+        comment_stream,
+        name='new_comments'
+    ),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path('api/news/', api.NewsResource.as_view(), name='api_news'),
+    path(
+        'api/news/<int:pk>/',
+        api.NewsResource.as_view(),
+        name='api_news_item'
+    ),
+    path(
+        'api/news/<int:news_pk>/comments/',
+        api.CommentResource.as_view(),
+        name='api_news_comments'
+    ),
+    path('api/comments/', api.CommentResource.as_view(), name='api_comments'),
+    path(
+        'api/comments/<int:pk>/',
+        api.CommentResource.as_view(),
+        name='api_comment'
+    ),
 ]
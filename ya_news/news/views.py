@@ -1,81 +1,251 @@
+import hashlib
+import time
+from http import HTTPStatus
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.contrib.auth.mixins import AccessMixin, LoginRequiredMixin
+from django.http import (
+    Http404, HttpResponse, HttpResponseRedirect, JsonResponse
+)
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.views import generic
+from django.views.decorators.http import condition
+
+from ya_common.pagination import CursorPage, CursorPaginator, InvalidCursor
+from ya_common.search import ranked
 
+from . import page_cache, pubsub, search
 from .forms import CommentForm
 from .models import Comment, News
+from .page_cache import AnonymousPageCacheMixin
+from .replica import ReplicaReadMixin
 
 
-class NewsList(generic.ListView):
-    """Список новостей."""
-    model = News
-    template_name = 'news/home.html'
+def news_etag(request, pk):
+    """
+    Валидатор страницы новости для авторизованного пользователя.
 
-    def get_queryset(self):
+    Сохранение комментария обновляет News.modified, поэтому хватает
+    одного запроса по первичному ключу. Страница зависит от
+    пользователя и его CSRF-токена, они тоже входят в ETag.
+    """
+    modified = News.objects.filter(pk=pk).values_list(
+        'modified', flat=True
+    ).first()
+    if modified is None:
+        return None
+    get_token(request)
+    return hashlib.md5('{}:{}:{}:{}'.format(
+        pk,
+        modified.isoformat(),
+        request.user.pk,
+        request.META['CSRF_COOKIE'],
+    ).encode()).hexdigest()
+
+
+class CursorPaginationMixin:
+    """Курсорная пагинация с курсором из GET-параметра cursor."""
+
+    def paginate_by_cursor(self, queryset, ordering, per_page):
+        paginator = CursorPaginator(queryset, ordering, per_page)
+        try:
+            return paginator.page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404('Некорректный курсор.')
+
+
+class CommentPageMixin(CursorPaginationMixin):
+    """Страница комментариев к новости в контексте шаблона."""
+
+    def get_comment_page(self, news_id):
+        return self.paginate_by_cursor(
+            Comment.objects.filter(news_id=news_id).select_related('author'),
+            Comment._meta.ordering,
+            settings.COMMENTS_COUNT_ON_NEWS_PAGE
+        )
+
+    def get_stream_cursor(self, news):
         """
-        Выводим только несколько последних новостей.
+        Курсор потока новых комментариев для показанной страницы.
 
-        Их количество определяется в настройках проекта.
+        Сохранение комментария обновляет News.modified, поэтому всё,
+        что создано позже, на странице ещё не показано.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return CursorPaginator(
+            Comment.objects.none(), Comment._meta.ordering, 0
+        ).encode_position((news.modified, 0))
 
 
-class NewsDetail(generic.DetailView):
+class NewsList(
+        ReplicaReadMixin,
+        AnonymousPageCacheMixin,
+        CursorPaginationMixin,
+        generic.ListView
+):
+    """Список новостей."""
     model = News
-    template_name = 'news/detail.html'
+    template_name = 'news/home.html'
 
-    def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
+    def get_queryset(self):
+        """
+        Выводим одну страницу новостей, начиная с курсора.
+
+        Размер страницы определяется в настройках проекта.
+        Число комментариев берётся из поля comment_count,
+        поэтому сами комментарии не загружаются.
+        """
+        self.cursor_page = self.paginate_by_cursor(
+            self.model.objects.all(),
+            self.model._meta.ordering,
+            settings.NEWS_COUNT_ON_HOME_PAGE
         )
-        return obj
+        return self.cursor_page.object_list
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        if self.request.user.is_authenticated:
-            context['form'] = CommentForm()
+        context['cursor_page'] = self.cursor_page
         return context
 
 
-class NewsComment(
-        LoginRequiredMixin,
-        generic.detail.SingleObjectMixin,
-        generic.FormView
+class NewsDetail(
+        AccessMixin,
+        ReplicaReadMixin,
+        AnonymousPageCacheMixin,
+        CommentPageMixin,
+        generic.DetailView
 ):
+    """
+    Новость с первой страницей комментариев и форма комментария.
+
+    GET и POST обслуживает одно представление: при ошибке в форме
+    страница строится по уже загруженной новости. Следующие страницы
+    комментариев подгружаются через NewsCommentList.
+    """
     model = News
-    form_class = CommentForm
     template_name = 'news/detail.html'
 
+    def get_cache_versions(self):
+        return (self.kwargs['pk'],)
+
+    def get(self, request, *args, **kwargs):
+        """Анонимам отвечает кэш страниц, остальным — условный GET."""
+        if not request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        return condition(etag_func=news_etag)(super().get)(
+            request, *args, **kwargs
+        )
+
     def post(self, request, *args, **kwargs):
+        """Комментарий может оставить только вошедший пользователь."""
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
         self.object = self.get_object()
-        return super().post(request, *args, **kwargs)
-
-    def form_valid(self, form):
+        form = CommentForm(request.POST)
+        if not form.is_valid():
+            return self.render_to_response(self.get_context_data(form=form))
         comment = form.save(commit=False)
         comment.news = self.object
-        comment.author = self.request.user
+        comment.author = request.user
         comment.save()
-        return super().form_valid(form)
+        return HttpResponseRedirect(reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments'] = self.get_comment_page(self.object.pk)
+        if settings.ASYNC_VIEWS:
+            context['stream_cursor'] = self.get_stream_cursor(self.object)
+        if self.request.user.is_authenticated:
+            context.setdefault('form', CommentForm())
+        return context
 
-    def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
 
+class NewsCommentList(CommentPageMixin, generic.TemplateView):
+    """Фрагмент HTML со следующей страницей комментариев."""
+    template_name = 'news/comments.html'
 
-class NewsDetailView(generic.View):
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['news_id'] = self.kwargs['pk']
+        context['comments'] = self.get_comment_page(self.kwargs['pk'])
+        return context
+
+
+class NewsCommentStream(generic.View):
+    """
+    Комментарии, добавленные после курсора.
+
+    Отдаёт JSON с HTML комментариев и курсором для следующего запроса
+    или 204, если новых нет. Синхронное представление отвечает сразу:
+    под WSGI ожидание держало бы поток сервера, поэтому страница
+    новости подписывается на поток только с ASYNC_VIEWS, где ждёт
+    news_comment_stream.
+    """
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        self.paginator = CursorPaginator(
+            Comment.objects.filter(
+                news_id=self.kwargs['pk']
+            ).select_related('author'),
+            Comment._meta.ordering,
+            settings.COMMENTS_COUNT_ON_NEWS_PAGE
+        )
+
+    def get_new_comments(self):
+        cursor = self.request.GET.get('cursor')
+        if not cursor:
+            raise Http404('Не указан курсор.')
+        try:
+            return self.paginator.page(cursor).object_list
+        except InvalidCursor:
+            raise Http404('Некорректный курсор.')
+
+    def render_comments(self, comments):
+        if not comments:
+            return HttpResponse(status=HTTPStatus.NO_CONTENT)
+        return JsonResponse({
+            'html': render_to_string(
+                'news/comments.html',
+                {
+                    'comments': CursorPage(
+                        comments,
+                        previous_cursor=self.request.GET.get('cursor'),
+                    ),
+                    'news_id': self.kwargs['pk'],
+                },
+                request=self.request,
+            ),
+            'cursor': self.paginator.encode_cursor(comments[-1]),
+        })
 
     def get(self, request, *args, **kwargs):
-        view = NewsDetail.as_view()
-        return view(request, *args, **kwargs)
+        return self.render_comments(self.get_new_comments())
 
-    def post(self, request, *args, **kwargs):
-        view = NewsComment.as_view()
-        return view(request, *args, **kwargs)
+
+class NewsSearch(generic.TemplateView):
+    """Поиск по новостям и комментариям через полнотекстовый индекс."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        context['query'] = query
+        if query:
+            limit = settings.SEARCH_RESULTS_COUNT
+            context['news_list'] = ranked(
+                News.objects.all(),
+                search.get_index('news').search(query, limit=limit)
+            )
+            context['comments'] = ranked(
+                Comment.objects.select_related('news', 'author'),
+                search.get_index('comment').search(query, limit=limit)
+            )
+        return context
 
 
 class CommentBase(LoginRequiredMixin):
@@ -83,14 +253,21 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
+        """Комментарий уже загружен, новость берём по news_id."""
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
-        """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        """
+        Пользователь может работать только со своими комментариями.
+
+        Заголовок новости нужен в шаблонах, поэтому новость
+        загружаем тем же запросом.
+        """
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -102,3 +279,72 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+
+# Асинхронные представления для ASGI (ASYNC_VIEWS, см. urls.py).
+# ORM в Django 3.2 только синхронный, поэтому вся работа с базой
+# выполняется одним переходом в поток на запрос. Все такие переходы
+# процесса идут в один поток (thread_sensitive), и записи в SQLite
+# из разных запросов не пересекаются.
+news_list_in_thread = sync_to_async(NewsList.as_view())
+news_detail_in_thread = sync_to_async(NewsDetail.as_view())
+
+
+async def is_anonymous(request):
+    """Без cookie сессии пользователь заведомо аноним: базу не трогаем."""
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return True
+    return await sync_to_async(lambda: request.user.is_anonymous)()
+
+
+async def cached_page(request, view_class, **kwargs):
+    """
+    Страница из кэша для анонимного GET или None.
+
+    Чтение кэша (в production это файлы FileBasedCache) блокирует,
+    поэтому идёт в пуле потоков, а не в цикле событий. Базу оно не
+    трогает, и общий поток ORM (thread_sensitive) ему не нужен.
+    """
+    if request.method not in ('GET', 'HEAD') or not (
+        await is_anonymous(request)
+    ):
+        return None
+    view = view_class()
+    view.setup(request, **kwargs)
+    return await sync_to_async(
+        page_cache.cached_response, thread_sensitive=False
+    )(request, view.get_cache_versions())
+
+
+async def news_list(request):
+    """Асинхронный NewsList."""
+    response = await cached_page(request, NewsList)
+    if response is None:
+        response = await news_list_in_thread(request)
+    return response
+
+
+async def news_detail(request, pk):
+    """Асинхронный NewsDetail, в том числе отправка комментария."""
+    response = await cached_page(request, NewsDetail, pk=pk)
+    if response is None:
+        response = await news_detail_in_thread(request, pk=pk)
+    return response
+
+
+async def news_comment_stream(request, pk):
+    """Асинхронный NewsCommentStream: ожидание не занимает поток."""
+    view = NewsCommentStream()
+    view.setup(request, pk=pk)
+    deadline = time.monotonic() + settings.COMMENT_STREAM_TIMEOUT
+    with pubsub.comments.subscribe(pk) as subscription:
+        comments = await sync_to_async(view.get_new_comments)()
+        while not comments:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            await subscription.wait_async(
+                min(remaining, settings.COMMENT_STREAM_POLL)
+            )
+            comments = await sync_to_async(view.get_new_comments)()
+    return await sync_to_async(view.render_comments)(comments)
@@ -1,9 +1,17 @@
+import os
+import sys
+import tempfile
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Общий для двух проектов пакет ya_common лежит в корне репозитория.
+if str(BASE_DIR.parent) not in sys.path:
+    sys.path.append(str(BASE_DIR.parent))
+
 SECRET_KEY = 'django-insecure-7)dgs++2!#==aye4rd=5)c)bw0eokiyqx0hts6#t80!$c&$s+('
 
 DEBUG = True
@@ -22,6 +30,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'ya_common.sqlite.SerializedWritesMiddleware',
+    'news.replica.StickyPrimaryMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -55,9 +65,36 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Файловая тестовая база: в общей in-memory базе SQLite
+        # параллельные записи из потоков падают с «table is locked».
+        # Параллельный режим run_tests.sh даёт каждому процессу свой файл.
+        'TEST': {
+            'NAME': os.environ.get(
+                'TEST_DATABASE_NAME', BASE_DIR / 'test_db.sqlite3'
+            ),
+        },
     }
 }
 
+# Реплика для чтения новостей (см. replica.py). Локально это второй
+# файл SQLite: DJANGO_REPLICA_NAME=replica.sqlite3, данные копирует
+# manage.py sync_replica. Без переменной реплика совпадает с default
+# и не используется.
+REPLICA_READS = bool(os.environ.get('DJANGO_REPLICA_NAME'))
+REPLICA_STICKY_SECONDS = 10
+DATABASES['replica'] = {
+    'ENGINE': DATABASES['default']['ENGINE'],
+    'NAME': os.environ.get(
+        'DJANGO_REPLICA_NAME', DATABASES['default']['NAME']
+    ),
+    'TEST': {
+        'NAME': Path(DATABASES['default']['TEST']['NAME']).with_suffix(
+            '.replica.sqlite3'
+        ),
+    },
+}
+DATABASE_ROUTERS = ['news.replica.PrimaryReplicaRouter']
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -80,3 +117,76 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_NEWS_PAGE = 50
+
+NEWS_PAGE_CACHE_TIMEOUT = 60 * 5
+
+SEARCH_RESULTS_COUNT = 20
+
+# Long-poll новых комментариев (см. pubsub.py): сколько ждать ответа
+# и как часто перечитывать базу ради комментариев из других процессов.
+COMMENT_STREAM_TIMEOUT = 25
+COMMENT_STREAM_POLL = 5
+
+# PRAGMA для каждого нового соединения с SQLite (см. signals.py):
+# WAL, чтобы чтение не ждало записи, и ожидание блокировки вместо
+# немедленной ошибки «database is locked».
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,
+    'temp_store': 'memory',
+}
+
+# Записи из потоков процесса идут в SQLite по одной (см. ya_common/sqlite.py).
+SQLITE_WRITE_QUEUE = os.environ.get('DJANGO_SQLITE_WRITE_QUEUE') == '1'
+
+# Асинхронные представления для чтения (см. urls.py); asgi.py
+# включает их сам, под WSGI остаются синхронные.
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS') == '1'
+
+# Профиль для боевого запуска: DJANGO_PROFILE=production.
+if os.environ.get('DJANGO_PROFILE') == 'production':
+    DEBUG = os.environ.get('DJANGO_DEBUG') == '1'
+    SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY')
+    if not SECRET_KEY:
+        raise ImproperlyConfigured('Задайте DJANGO_SECRET_KEY.')
+    ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost').split(',')
+
+    # Соединение живёт между запросами вместо открытия на каждый.
+    for database in DATABASES.values():
+        database['CONN_MAX_AGE'] = int(
+            os.environ.get('DJANGO_CONN_MAX_AGE', 600)
+        )
+    SQLITE_PRAGMAS['busy_timeout'] = 20000
+
+    # Общий для процессов кэш: на нём держатся версии закэшированных
+    # данных, поэтому locmem подходит только для одного процесса.
+    CACHES = {
+        'default': {
+            'BACKEND': os.environ.get(
+                'DJANGO_CACHE_BACKEND',
+                'django.core.cache.backends.filebased.FileBasedCache',
+            ),
+            'LOCATION': os.environ.get(
+                'DJANGO_CACHE_LOCATION',
+                str(Path(tempfile.gettempdir()) / 'yanews-cache'),
+            ),
+        }
+    }
+    # Сессия читается из кэша, в базу — только при записи.
+    # django.contrib.sessions.backends.signed_cookies обходится без неё.
+    SESSION_ENGINE = os.environ.get(
+        'DJANGO_SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db'
+    )
+
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
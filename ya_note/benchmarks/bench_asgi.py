@@ -0,0 +1,35 @@
+"""
+WSGI против ASGI на страницах YaNote (см. ya_common.benchmarks.asgi).
+
+Запуск из каталога ya_note:
+    python -m benchmarks.bench_asgi --clients 200
+"""
+from ya_common.benchmarks import asgi
+
+
+def scenarios():
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from django.urls import reverse
+
+    from notes import bulk
+
+    user = get_user_model().objects.create(username='bench')
+    bulk.import_notes(
+        (
+            {'title': f'Заметка {number}', 'text': 'текст заметки'}
+            for number in range(1000)
+        ),
+        user,
+    )
+    client = Client()
+    client.force_login(user)
+    name = settings.SESSION_COOKIE_NAME
+    cookie = f'{name}={client.cookies[name].value}'
+    yield 'notes:home anonymous', reverse('notes:home'), ''
+    yield 'notes:list', reverse('notes:list'), cookie
+
+
+if __name__ == '__main__':
+    asgi.main('benchmarks.bench_asgi', 'yanote.settings', scenarios)
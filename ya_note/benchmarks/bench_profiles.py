@@ -0,0 +1,10 @@
+"""
+Профили настроек YaNote (см. ya_common.benchmarks.profiles).
+
+Запуск из каталога ya_note:
+    python -m benchmarks.bench_profiles --requests 100
+"""
+from ya_common.benchmarks import profiles
+
+if __name__ == '__main__':
+    profiles.main()
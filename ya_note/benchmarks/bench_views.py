@@ -0,0 +1,69 @@
+"""
+Нагрузочный бенчмарк страниц YaNote.
+
+Запуск из каталога ya_note:
+    python -m benchmarks.bench_views --output results.json
+Регрессия относительно benchmarks/baseline.json завершает запуск
+с кодом 1; --save-baseline обновляет базовый замер.
+"""
+import sys
+from http import HTTPStatus
+from itertools import count
+from pathlib import Path
+
+from ya_common.benchmarks import harness
+
+BASELINE = Path(__file__).with_name('baseline.json')
+NOTES = 1000
+
+
+def scenarios():
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from django.urls import reverse
+
+    from notes import bulk
+
+    user = get_user_model().objects.create(username='bench')
+    bulk.import_notes(
+        (
+            {'title': f'Заметка {number}', 'text': 'текст заметки'}
+            for number in range(NOTES)
+        ),
+        user,
+    )
+    client = Client()
+    client.force_login(user)
+
+    def get_list():
+        url = reverse('notes:list')
+
+        def request():
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK, response
+        return request
+
+    def post_note():
+        url = reverse('notes:add')
+        numbers = count()
+
+        def request():
+            response = client.post(url, {
+                'title': f'Новая заметка {next(numbers)}', 'text': 'текст'
+            })
+            assert response.status_code == HTTPStatus.FOUND, response
+        return request
+
+    yield 'notes:list', get_list
+    yield 'notes:add', post_note
+
+
+def main():
+    args = harness.parse_args(__doc__, BASELINE)
+    harness.setup('yanote.settings')
+    with harness.test_database():
+        return harness.run(list(scenarios()), args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,40 @@
+"""JSON API заметок для мобильного клиента."""
+from django.db import IntegrityError, transaction
+
+from ya_common.jsonapi import ResourceView
+
+from .forms import WARNING, NoteForm
+from .models import Note, is_slug_conflict
+
+
+class NoteResource(ResourceView):
+    """Заметки вошедшего пользователя; в списке нет текста заметки."""
+    fields = {
+        'id': 'id',
+        'title': 'title',
+        'text': 'text',
+        'slug': 'slug',
+        'updated': 'updated',
+    }
+    list_fields = ('id', 'title', 'slug')
+    model = Note
+    ordering = ('id',)
+    lookup_field = 'slug'
+    form_class = NoteForm
+    login_required = True
+
+    def get_queryset(self):
+        return super().get_queryset().filter(author=self.request.user)
+
+    def perform_save(self, form):
+        """Занятый между проверкой и записью slug — ошибка формы."""
+        form.instance.author = self.request.user
+        try:
+            with transaction.atomic():
+                return form.save()
+        except IntegrityError:
+            if not is_slug_conflict(
+                [form.instance.slug], exclude_pk=form.instance.pk
+            ):
+                raise
+            form.add_error('slug', form.instance.slug + WARNING)
@@ -0,0 +1,210 @@
+"""
+Массовый импорт и экспорт заметок в JSON и CSV.
+
+Файл читается по частям: JSON-массив разбирается объект за объектом,
+CSV — строка за строкой. Заметки проверяются и вставляются пачками
+по batch_size через bulk_create внутри одной транзакции, slug для
+пачки подбираются одним-двумя запросами. Экспорт отдаёт заметки
+генератором, не загружая их все в память.
+"""
+import csv
+import json
+import tempfile
+from functools import reduce
+from itertools import islice
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from pytils.translit import slugify
+
+from ya_common import jsonstream
+
+from . import search
+from .forms import WARNING
+from .models import SUFFIX_LENGTH, Note, is_slug_conflict, slug_candidates
+
+FORMATS = ('json', 'csv')
+FIELDS = ('title', 'text', 'slug')
+BATCH_SIZE = 500
+SPOOL_SIZE = 1024 * 1024
+
+
+def iter_json(stream, read_size=jsonstream.READ_SIZE):
+    """Элементы JSON-массива по одному; ошибки разбора — ValidationError."""
+    try:
+        yield from jsonstream.iter_json(stream, read_size)
+    except ValueError as error:
+        raise ValidationError(str(error)) from None
+
+
+def iter_csv(stream):
+    """Строки CSV с заголовком как словари."""
+    reader = csv.DictReader(stream)
+    if not reader.fieldnames or not {'title', 'text'} <= set(
+        reader.fieldnames
+    ):
+        raise ValidationError('В CSV нужны столбцы title и text.')
+    return reader
+
+
+def read_records(stream, format):
+    """Записи заметок из текстового потока в формате format."""
+    if format == 'csv':
+        return iter_csv(stream)
+    return iter_json(stream)
+
+
+def build_note(number, record, author):
+    """Заметка из записи без запросов к базе: slug проверяется пачкой."""
+    if not isinstance(record, dict):
+        raise ValidationError(f'Запись {number}: ожидается объект.')
+    note = Note(
+        author=author,
+        **{
+            field: record[field]
+            for field in FIELDS
+            if record.get(field) is not None
+        }
+    )
+    try:
+        note.full_clean(exclude=('author',), validate_unique=False)
+    except ValidationError as error:
+        raise ValidationError(
+            f'Запись {number}: ' + '; '.join(
+                f'{field}: {" ".join(messages)}'
+                for field, messages in error.message_dict.items()
+            )
+        )
+    return note
+
+
+def resolve_slugs(batch, taken):
+    """
+    Назначает slug заметкам пачки.
+
+    Явно указанный slug должен быть свободен. Пустой slug строится
+    из заголовка с суффиксом -2, -3..., как в Note.save, и не
+    занимает явно указанные. Занятые slug берутся одним запросом,
+    а для занятых основ — ещё одним запросом по префиксу. taken
+    накапливает slug всего импорта.
+    """
+    max_length = Note._meta.get_field('slug').max_length
+    bases = {
+        id(note): slugify(note.title)[:max_length]
+        for _, note in batch
+        if not note.slug
+    }
+    wanted = {note.slug for _, note in batch if note.slug}
+    taken.update(Note.objects.filter(
+        slug__in=wanted | set(bases.values())
+    ).values_list('slug', flat=True))
+    for number, note in batch:
+        if note.slug:
+            if note.slug in taken:
+                raise ValidationError(
+                    f'Запись {number}: {note.slug}{WARNING}'
+                )
+            taken.add(note.slug)
+    busy = {base for base in bases.values() if base in taken}
+    if busy:
+        taken.update(Note.objects.filter(reduce(or_, (
+            Q(slug__startswith=base[:max_length - SUFFIX_LENGTH])
+            for base in busy
+        ))).values_list('slug', flat=True))
+    for _, note in batch:
+        if not note.slug:
+            note.slug = next(
+                slug
+                for slug in slug_candidates(bases[id(note)], max_length)
+                if slug not in taken
+            )
+            taken.add(note.slug)
+
+
+def import_notes(records, author, batch_size=BATCH_SIZE):
+    """
+    Импортирует записи заметок автора, возвращает их число.
+
+    Всё выполняется в одной транзакции: ошибка в любой записи
+    откатывает импорт целиком. bulk_create не шлёт сигналы, поэтому
+    новые заметки добавляются в поисковый индекс здесь же. Slug,
+    занятый другим запросом во время импорта, — ValidationError.
+    """
+    index = search.get_index()
+    records = enumerate(records, start=1)
+    taken = set()
+    total = 0
+    batch = []
+    try:
+        with transaction.atomic():
+            while True:
+                batch = [
+                    (number, build_note(number, record, author))
+                    for number, record in islice(records, batch_size)
+                ]
+                if not batch:
+                    return total
+                resolve_slugs(batch, taken)
+                total += insert_batch(
+                    [note for _, note in batch], author, index
+                )
+    except IntegrityError:
+        if not is_slug_conflict([note.slug for _, note in batch]):
+            raise
+        raise ValidationError('Slug заметки заняли во время импорта.')
+
+
+def insert_batch(notes, author, index):
+    """Вставляет пачку заметок и добавляет их в поисковый индекс."""
+    notes = Note.objects.bulk_create(notes)
+    if not connection.features.can_return_rows_from_bulk_insert:
+        ids = dict(Note.objects.filter(
+            slug__in=[note.slug for note in notes]
+        ).values_list('slug', 'id'))
+        for note in notes:
+            note.pk = ids[note.slug]
+    index.add_many(
+        (note.pk, search.note_document(note), author.pk)
+        for note in notes
+    )
+    return len(notes)
+
+
+class Echo:
+    """Файлоподобный объект, который возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def spool(chunks, max_size=SPOOL_SIZE):
+    """
+    Текстовые куски в UTF-8 во временном файле, открытом с начала.
+
+    Небольшая выгрузка остаётся в памяти, большая уходит на диск.
+    """
+    file = tempfile.SpooledTemporaryFile(max_size)
+    for chunk in chunks:
+        file.write(chunk.encode())
+    file.seek(0)
+    return file
+
+
+def export_notes(queryset, format, batch_size=BATCH_SIZE):
+    """Заметки queryset в формате format, по строке на заметку."""
+    rows = queryset.order_by('id').values_list(*FIELDS).iterator(batch_size)
+    if format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(FIELDS)
+        for row in rows:
+            yield writer.writerow(row)
+        return
+    separator = '[\n'
+    for row in rows:
+        yield separator + json.dumps(
+            dict(zip(FIELDS, row)), ensure_ascii=False
+        )
+        separator = ',\n'
+    yield '[]\n' if separator == '[\n' else '\n]\n'
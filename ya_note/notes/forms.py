@@ -1,5 +1,3 @@
-from pytils.translit import slugify
-
 from django import forms
 from django.core.exceptions import ValidationError
 
@@ -16,14 +14,42 @@ class NoteForm(forms.ModelForm):
         fields = ('title', 'text', 'slug')
 
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
+        """
+        Обрабатывает случай, если slug не уникален.
+
+        Пустой slug подберёт Note.save при вставке, добавив суффикс,
+        если slug из заголовка уже занят.
+        """
+        slug = self.cleaned_data.get('slug')
         if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
+            return slug
         if Note.objects.filter(
                 slug=slug
         ).exclude(id=self.instance.pk).exists():
             raise ValidationError(slug + WARNING)
         return slug
+
+    def clean(self):
+        """
+        Повторную проверку уникальности запросом к базе не запускаем.
+
+        Единственное уникальное поле заметки, slug, уже проверено
+        в clean_slug. ModelForm.validate_unique вызывается, только
+        если clean() вызывает родительский clean() (см. документацию
+        Django об этом методе ModelForm).
+        """
+        return self.cleaned_data
+
+
+class NoteImportForm(forms.Form):
+    """Файл с заметками для массового импорта."""
+    FORMAT_CHOICES = (('json', 'JSON'), ('csv', 'CSV'))
+
+    file = forms.FileField(
+        label='Файл',
+        help_text=('JSON-массив объектов или CSV с заголовком; поля '
+                   'title, text и необязательное slug')
+    )
+    format = forms.ChoiceField(
+        label='Формат', choices=FORMAT_CHOICES, initial='json'
+    )
@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes import bulk
+from notes.models import Note
+
+
+class Command(BaseCommand):
+    help = 'Выгружает заметки пользователя в JSON или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--username', required=True, help='Автор заметок.'
+        )
+        parser.add_argument(
+            '--format', choices=bulk.FORMATS, default='json',
+            help='Формат выгрузки.',
+        )
+        parser.add_argument(
+            '--output', help='Файл для выгрузки; по умолчанию stdout.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            author = get_user_model().objects.get(
+                username=options['username']
+            )
+        except get_user_model().DoesNotExist:
+            raise CommandError('Пользователь не найден.')
+        chunks = bulk.export_notes(
+            Note.objects.filter(author=author), options['format']
+        )
+        if options['output'] is None:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(
+            options['output'], 'w', encoding='utf-8', newline=''
+        ) as file:
+            file.writelines(chunks)
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from notes import bulk
+
+
+class Command(BaseCommand):
+    help = 'Импортирует заметки пользователя из файла JSON или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с заметками.')
+        parser.add_argument(
+            '--username', required=True, help='Автор заметок.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=bulk.FORMATS,
+            help='Формат файла; по умолчанию берётся из расширения.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=bulk.BATCH_SIZE,
+            help='Заметок в одной вставке.',
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        format = options['format'] or path.suffix.lstrip('.').lower()
+        if format not in bulk.FORMATS:
+            raise CommandError(f'Неизвестный формат файла: {path}')
+        try:
+            author = get_user_model().objects.get(
+                username=options['username']
+            )
+        except get_user_model().DoesNotExist:
+            raise CommandError('Пользователь не найден.')
+        try:
+            with path.open(encoding='utf-8-sig', newline='') as stream:
+                total = bulk.import_notes(
+                    bulk.read_records(stream, format),
+                    author,
+                    batch_size=options['batch_size'],
+                )
+        except ValidationError as error:
+            raise CommandError(' '.join(error.messages))
+        self.stdout.write(
+            self.style.SUCCESS(f'Импортировано заметок: {total}')
+        )
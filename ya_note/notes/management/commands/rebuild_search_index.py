@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from notes import search
+from notes.models import Note
+
+CHUNK_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс заметок.'
+
+    def handle(self, *args, **options):
+        index = search.get_index()
+        notes = Note.objects.only('title', 'text', 'author_id').order_by()
+        with transaction.atomic():
+            index.clear()
+            total = 0
+            for note in notes.iterator(CHUNK_SIZE):
+                index.update(
+                    note.pk,
+                    search.note_document(note),
+                    owner_id=note.author_id,
+                    created=True,
+                )
+                total += 1
+        self.stdout.write(
+            self.style.SUCCESS(f'Проиндексировано заметок: {total}')
+        )
@@ -1,8 +1,39 @@
+from itertools import count
+
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 
 from pytils.translit import slugify
 
+SLUG_ATTEMPTS = 100
+# Запас длины под суффикс вида -123.
+SUFFIX_LENGTH = 11
+
+
+def is_slug_conflict(slugs, exclude_pk=None):
+    """
+    Проверяет, что запись не прошла из-за уже занятого slug.
+
+    Вызывается после отката точки сохранения, в которой упал запрос.
+    По тексту IntegrityError причину надёжно не определить: он свой
+    у каждой базы и совпадёт с любым ограничением, в имени которого
+    есть slug. Строка, с которой случился конфликт, уже записана,
+    и при READ COMMITTED (уровень Django по умолчанию) новый запрос
+    её видит.
+    """
+    notes = Note.objects.filter(slug__in=slugs)
+    if exclude_pk is not None:
+        notes = notes.exclude(pk=exclude_pk)
+    return notes.exists()
+
+
+def slug_candidates(base, max_length):
+    """Варианты base, base-2, base-3... с учётом длины slug."""
+    yield base
+    for number in count(2):
+        suffix = f'-{number}'
+        yield base[:max_length - len(suffix)] + suffix
+
 
 class Note(models.Model):
     title = models.CharField(
@@ -27,12 +58,76 @@ class Note(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated = models.DateTimeField('Изменена', auto_now=True)
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            self._save_with_free_slug(*args, **kwargs)
+
+    def _save_with_free_slug(self, *args, **kwargs):
+        """
+        Сохраняет заметку со slug из заголовка, добавляя -2, -3...
+
+        Занятость slug проверяет сама вставка: при конфликте
+        уникального индекса откатываемся к точке сохранения и пробуем
+        следующий свободный вариант. В обычном случае это один INSERT,
+        а одновременные вставки не приводят к IntegrityError.
+        """
+        max_length = self._meta.get_field('slug').max_length
+        base = slugify(self.title)[:max_length]
+        taken = set()
+        conflicts = 0
+        for slug in slug_candidates(base, max_length):
+            if slug in taken:
+                continue
+            self.slug = slug
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                # Занятые варианты нужны для следующей попытки, они же
+                # показывают, был ли это конфликт slug.
+                taken = set(Note.objects.filter(
+                    slug__startswith=base[:max_length - SUFFIX_LENGTH]
+                ).values_list('slug', flat=True))
+                if slug not in taken:
+                    raise
+            conflicts += 1
+            if conflicts >= SLUG_ATTEMPTS:
+                raise IntegrityError(
+                    f'Не удалось подобрать slug для «{base}».'
+                )
+
+
+class SearchTerm(models.Model):
+    """Запись обратного индекса для баз без FTS5 (см. notes.search)."""
+    TERM_LENGTH = 100
+
+    kind = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    owner_id = models.BigIntegerField(null=True)
+    term = models.CharField(max_length=TERM_LENGTH)
+    frequency = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('kind', 'term'), name='search_kind_term_idx'),
+            models.Index(
+                fields=('kind', 'owner_id', 'term'),
+                name='search_kind_owner_term_idx',
+            ),
+            models.Index(
+                fields=('kind', 'object_id'), name='search_kind_object_idx'
+            ),
+        )
@@ -0,0 +1,20 @@
+"""
+Поисковый индекс заметок.
+
+Стемминг и оба вида индекса — в ya_common.search; здесь выбираются
+таблица FTS5 приложения и модель SearchTerm.
+"""
+from ya_common.search import Fts5Index, TermIndex, fts5_available
+
+from .models import SearchTerm
+
+
+def get_index(kind='note'):
+    """Индекс для объектов вида kind."""
+    if fts5_available():
+        return Fts5Index(f'notes_search_{kind}')
+    return TermIndex(SearchTerm, kind)
+
+
+def note_document(note):
+    return f'{note.title}\n{note.text}'
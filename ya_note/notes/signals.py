@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import search
+from .models import Note
+
+
+@receiver(post_save, sender=Note)
+def index_note(sender, instance, created, **kwargs):
+    search.get_index().update(
+        instance.pk,
+        search.note_document(instance),
+        owner_id=instance.author_id,
+        created=created,
+    )
+
+
+@receiver(post_delete, sender=Note)
+def unindex_note(sender, instance, **kwargs):
+    search.get_index().remove(instance.pk)
@@ -1,13 +1,43 @@
+import asyncio
+from contextlib import contextmanager
+from importlib import reload
+
+from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
-from django.urls import reverse
+from django.test import AsyncClient, TestCase, Client, override_settings
+from django.urls import clear_url_caches, resolve, reverse
 
-from notes.models import Note
+import notes.urls
+import yanote.urls
+from ya_common.search import Fts5Index, TermIndex, fts5_available
+from notes.models import Note, SearchTerm
 from notes.forms import NoteForm
 
 User = get_user_model()
 
 
+@contextmanager
+def async_views():
+    """Project URLs rebuilt with the views of ASYNC_VIEWS."""
+    try:
+        with override_settings(ASYNC_VIEWS=True):
+            reload(notes.urls)
+            reload(yanote.urls)
+            clear_url_caches()
+            yield
+    finally:
+        reload(notes.urls)
+        reload(yanote.urls)
+        clear_url_caches()
+
+
+def async_get(client, url):
+    """Run an AsyncClient GET from synchronous test code."""
+    async def get():
+        return await client.get(url)
+    return async_to_sync(get)()
+
+
 class TestContent(TestCase):
 
     @classmethod
@@ -35,6 +65,22 @@ class TestContent(TestCase):
                 object_list = response.context['object_list']
                 self.assertEqual(self.note in object_list, is_note_in_list)
 
+    def test_async_notes_list(self):
+        """Async notes list shows own notes and redirects anonymous."""
+        with async_views():
+            url = reverse('notes:list')
+            self.assertTrue(asyncio.iscoroutinefunction(resolve(url).func))
+            client = AsyncClient()
+            client.force_login(self.author)
+            response = async_get(client, url)
+            self.assertIn(self.note, response.context['object_list'])
+            response = async_get(AsyncClient(), url)
+            self.assertRedirects(
+                response,
+                f'{reverse("users:login")}?next={url}',
+                fetch_redirect_response=False,
+            )
+
     def test_pages_contains_form(self):
         """Note edit/add pages receive NoteForm."""
         names = (
@@ -47,3 +93,71 @@ class TestContent(TestCase):
                 response = self.author_client.get(url)
                 self.assertIn('form', response.context)
                 self.assertIsInstance(response.context['form'], NoteForm)
+
+    @override_settings(NOTES_COUNT_ON_LIST_PAGE=2)
+    def test_notes_list_pagination(self):
+        """Notes list is paginated by cursor and skips note text."""
+        Note.objects.bulk_create(
+            Note(title=f'note {index}', slug=f'note-{index}',
+                 text='long text', author=self.author)
+            for index in range(4)
+        )
+        url = reverse('notes:list')
+        shown = []
+        cursor = None
+        while True:
+            params = {'cursor': cursor} if cursor else {}
+            page = self.author_client.get(url, params).context['cursor_page']
+            self.assertLessEqual(len(page), 2)
+            for note in page:
+                self.assertIn('text', note.get_deferred_fields())
+            shown.extend(note.pk for note in page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual(
+            shown,
+            list(Note.objects.filter(author=self.author).values_list(
+                'pk', flat=True
+            ).order_by('pk'))
+        )
+
+    def test_search_notes(self):
+        """Search finds only user notes by other word forms."""
+        Note.objects.create(
+            title='Список покупок', text='Купить новые книги',
+            slug='shopping', author=self.author
+        )
+        Note.objects.create(
+            title='Чужая заметка', text='Книги для чтения',
+            slug='books', author=self.user
+        )
+        response = self.author_client.get(
+            reverse('notes:search'), {'q': 'книга'}
+        )
+        self.assertEqual(
+            [note.slug for note in response.context['object_list']],
+            ['shopping']
+        )
+
+    def test_search_ignores_other_users_corpus(self):
+        """Another user's larger corpus does not change search results."""
+        indexes = [TermIndex(SearchTerm, 'note')]
+        if fts5_available():
+            indexes.append(Fts5Index('notes_search_note'))
+        for index in indexes:
+            with self.subTest(index=type(index).__name__):
+                index.add_many([
+                    (10001, 'кактус свет полив', self.author.pk),
+                    (10002, 'кактус кактус полив', self.author.pk),
+                ])
+                expected = index.search('кактус', owner_id=self.author.pk)
+                index.add_many(
+                    (pk, 'кактус кактус кактус кактус', self.user.pk)
+                    for pk in range(20000, 20500)
+                )
+                self.assertEqual(expected, [10002, 10001])
+                self.assertEqual(
+                    index.search('кактус', owner_id=self.author.pk),
+                    expected
+                )
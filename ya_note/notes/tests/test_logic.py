@@ -1,10 +1,24 @@
+import io
+import json
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.handlers.asgi import ASGIHandler
+from django.core.signals import request_finished, request_started
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import close_old_connections, connection
+from django.test import Client, TestCase, TransactionTestCase
 from django.urls import reverse
 from pytils.translit import slugify
 
-from notes.models import Note
-from notes.forms import WARNING
+from notes import bulk, search
+from notes.forms import WARNING, NoteForm
+from notes.models import Note, is_slug_conflict
 
 User = get_user_model()
 
@@ -75,6 +89,68 @@ class TestNoteCreation(TestCase):
         new_note = Note.objects.get()
         self.assertEqual(new_note.slug, slugify(self.NOTE_DATA['title']))
 
+    def test_empty_slug_collision(self):
+        """Taken slug from title gets a numeric suffix."""
+        Note.objects.all().delete()
+        without_slug = self.NOTE_DATA.copy()
+        without_slug.pop('slug')
+        for _ in range(3):
+            self.user_client.post(self.create_note_url, without_slug)
+        slug = slugify(self.NOTE_DATA['title'])
+        self.assertEqual(
+            set(Note.objects.values_list('slug', flat=True)),
+            {slug, f'{slug}-2', f'{slug}-3'}
+        )
+
+    def test_slug_taken_after_form_check(self):
+        """Slug taken after the form check is a form error, not a 500."""
+        Note.objects.all().delete()
+        Note.objects.create(
+            title='test', text='test text', author=self.user,
+            slug=self.NOTE_DATA['slug']
+        )
+        with mock.patch.object(
+            NoteForm, 'clean_slug', lambda form: form.cleaned_data['slug']
+        ):
+            response = self.user_client.post(
+                self.create_note_url, self.NOTE_DATA
+            )
+        self.assertFormError(
+            response, 'form', 'slug',
+            errors=(self.NOTE_DATA['slug'] + WARNING)
+        )
+
+    def test_slug_conflict_check(self):
+        """Only a slug taken by another note counts as a conflict."""
+        note = Note.objects.create(
+            title='test', text='test text', author=self.user, slug='taken'
+        )
+        self.assertTrue(is_slug_conflict(['taken']))
+        self.assertFalse(is_slug_conflict(['taken'], exclude_pk=note.pk))
+        self.assertFalse(is_slug_conflict(['free']))
+
+
+class TestConcurrentNoteCreation(TransactionTestCase):
+
+    WORKERS = 8
+    NOTES = 40
+
+    def test_parallel_creates_get_unique_slugs(self):
+        """Parallel creates with the same title never fail."""
+        user = User.objects.create(username='username')
+
+        def create(_):
+            try:
+                Note.objects.create(title='title', text='text', author=user)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.WORKERS) as executor:
+            list(executor.map(create, range(self.NOTES)))
+        slugs = list(Note.objects.values_list('slug', flat=True))
+        self.assertEqual(len(slugs), self.NOTES)
+        self.assertEqual(len(set(slugs)), self.NOTES)
+
 
 class TestNoteDeleteEdit(TestCase):
 
@@ -135,3 +211,243 @@ class TestNoteDeleteEdit(TestCase):
         self.assertEqual(self.note.text, self.NOTE['text'])
         self.assertEqual(self.note.title, self.NOTE['title'])
         self.assertEqual(self.note.slug, self.NOTE['slug'])
+
+
+class TestNoteImportExport(TestCase):
+
+    RECORDS = [
+        {'title': 'title', 'text': 'first'},
+        {'title': 'title', 'text': 'second'},
+        {'title': 'other', 'text': 'third', 'slug': 'other-slug'},
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='username')
+        cls.user_client = Client()
+        cls.user_client.force_login(cls.user)
+        Note.objects.create(
+            title='title', text='existing', slug='title', author=cls.user
+        )
+
+    def upload(self, content, format='json'):
+        return self.user_client.post(reverse('notes:import'), {
+            'file': SimpleUploadedFile(f'notes.{format}', content.encode()),
+            'format': format,
+        })
+
+    def test_import_json(self):
+        """JSON import creates notes with free slugs and indexes them."""
+        response = self.upload(json.dumps(self.RECORDS))
+        self.assertRedirects(response, reverse('notes:success'))
+        self.assertEqual(
+            set(Note.objects.values_list('slug', flat=True)),
+            {'title', 'title-2', 'title-3', 'other-slug'}
+        )
+        self.assertEqual(
+            len(search.get_index().search('third', owner_id=self.user.pk)),
+            1
+        )
+
+    def test_import_csv(self):
+        """CSV import reads rows by header."""
+        response = self.upload(
+            'title,text,slug\r\nновая,текст,\r\nещё,текст,csv-slug\r\n',
+            'csv'
+        )
+        self.assertRedirects(response, reverse('notes:success'))
+        self.assertEqual(Note.objects.count(), 3)
+        self.assertTrue(Note.objects.filter(slug='csv-slug').exists())
+
+    def test_import_error_rolls_back(self):
+        """Invalid record aborts the whole import."""
+        records = self.RECORDS + [{'title': 'x', 'text': 'y', 'slug': 'title'}]
+        response = self.upload(json.dumps(records))
+        self.assertFormError(
+            response, 'form', 'file', f'Запись 4: title{WARNING}'
+        )
+        self.assertEqual(Note.objects.count(), 1)
+
+    def test_import_broken_json(self):
+        """Truncated JSON is reported as a form error."""
+        response = self.upload(json.dumps(self.RECORDS)[:-5])
+        self.assertFormError(response, 'form', 'file', 'Некорректный JSON.')
+
+    def test_iter_json_reads_by_chunks(self):
+        """JSON array is parsed across small read chunks."""
+        stream = io.StringIO(json.dumps(self.RECORDS, indent=2))
+        self.assertEqual(
+            list(bulk.iter_json(stream, read_size=7)), self.RECORDS
+        )
+
+    def test_iter_json_numbers_across_chunks(self):
+        """Numbers split between read chunks are parsed whole."""
+        values = [123456789, -1.5e10, 0.25]
+        for read_size in range(1, 10):
+            with self.subTest(read_size=read_size):
+                stream = io.StringIO(json.dumps(values))
+                self.assertEqual(
+                    list(bulk.iter_json(stream, read_size=read_size)), values
+                )
+
+    def test_import_in_batches(self):
+        """Slugs stay unique across batches."""
+        records = [{'title': 'title', 'text': 'text'}] * 7
+        bulk.import_notes(iter(records), self.user, batch_size=3)
+        self.assertEqual(
+            len(set(Note.objects.values_list('slug', flat=True))), 8
+        )
+
+    def test_export_round_trip(self):
+        """Exported JSON and CSV can be imported back."""
+        for format in bulk.FORMATS:
+            with self.subTest(format=format):
+                response = self.user_client.get(
+                    reverse('notes:export'), {'format': format}
+                )
+                content = b''.join(response.streaming_content).decode()
+                records = list(
+                    bulk.read_records(io.StringIO(content), format)
+                )
+                self.assertEqual(
+                    [(record['title'], record['slug']) for record in records],
+                    [('title', 'title')]
+                )
+
+    def test_export_under_asgi(self):
+        """ASGI server gets the whole export, ORM stays off the loop."""
+        name = settings.SESSION_COOKIE_NAME
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': reverse('notes:export'),
+            'query_string': b'format=json',
+            'headers': [(
+                b'cookie',
+                f'{name}={self.user_client.cookies[name].value}'.encode(),
+            )],
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        # Как тестовый клиент: иначе сигналы закроют соединение теста.
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        try:
+            async_to_sync(ASGIHandler())(scope, receive, send)
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+        self.assertEqual(messages[0]['status'], 200)
+        body = b''.join(message.get('body', b'') for message in messages[1:])
+        self.assertEqual(
+            [record['slug'] for record in json.loads(body)], ['title']
+        )
+
+    def test_management_commands(self):
+        """Notes are imported and exported from the command line."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = f'{directory}/notes.json'
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump(self.RECORDS, file)
+            call_command(
+                'import_notes', path, username='username', stdout=io.StringIO()
+            )
+        output = io.StringIO()
+        call_command('export_notes', username='username', stdout=output)
+        self.assertEqual(len(json.loads(output.getvalue())), 4)
+
+
+class TestNoteApi(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='username')
+        cls.user_client = Client()
+        cls.user_client.force_login(cls.user)
+        cls.reader = User.objects.create(username='reader')
+        Note.objects.bulk_create(
+            Note(title=f'title {index}', text='text', slug=f'note-{index}',
+                 author=cls.user)
+            for index in range(5)
+        )
+        cls.notes = list(Note.objects.order_by('id'))
+        cls.list_url = reverse('notes:api_notes')
+
+    def send(self, method, url, data, client=None):
+        return getattr(client or self.user_client, method)(
+            url, json.dumps(data), content_type='application/json'
+        )
+
+    def test_login_required(self):
+        """Anonymous user gets 401 and sees no notes."""
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, 401)
+
+    def test_list_fields_and_cursor(self):
+        """List omits text and pages through the user's notes."""
+        page = self.user_client.get(self.list_url, {'limit': 3}).json()
+        self.assertEqual(list(page['results'][0]), ['id', 'title', 'slug'])
+        rest = self.user_client.get(
+            self.list_url, {'cursor': page['next'], 'fields': 'slug'}
+        ).json()
+        self.assertEqual(
+            [note['slug'] for note in page['results'] + rest['results']],
+            [note.slug for note in self.notes],
+        )
+        self.assertIsNone(rest['next'])
+
+    def test_batch_by_ids(self):
+        """Batch fetch returns own notes only, in the requested order."""
+        foreign = Note.objects.create(
+            title='foreign', text='text', slug='foreign', author=self.reader
+        )
+        ids = [self.notes[2].pk, foreign.pk, self.notes[0].pk]
+        response = self.user_client.get(
+            self.list_url, {'ids': ','.join(map(str, ids))}
+        )
+        self.assertEqual(
+            [note['id'] for note in response.json()['results']],
+            [self.notes[2].pk, self.notes[0].pk],
+        )
+
+    def test_create_edit_delete(self):
+        """Notes are created, patched and deleted through the API."""
+        response = self.send('post', self.list_url, {
+            'title': 'Новая', 'text': 'text'
+        })
+        self.assertEqual(response.status_code, 201)
+        url = reverse('notes:api_note', args=(response.json()['slug'],))
+        response = self.send('patch', url, {'text': 'edited'})
+        self.assertEqual(response.json()['text'], 'edited')
+        self.assertEqual(response.json()['title'], 'Новая')
+        response = self.send('delete', url, {}, client=Client())
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.user_client.delete(url).status_code, 204)
+        self.assertEqual(Note.objects.count(), 5)
+
+    def test_not_unique_slug(self):
+        """Slug conflict is reported as a form error."""
+        response = self.send('post', self.list_url, {
+            'title': 'title', 'text': 'text', 'slug': self.notes[0].slug
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()['errors']['slug'][0]['message'],
+            self.notes[0].slug + WARNING,
+        )
+
+    def test_foreign_note(self):
+        """Another user's note is not found."""
+        reader = Client()
+        reader.force_login(self.reader)
+        url = reverse('notes:api_note', args=(self.notes[0].slug,))
+        self.assertEqual(reader.get(url).status_code, 404)
+        self.assertEqual(
+            self.send('patch', url, {'text': 'x'}, reader).status_code, 404
+        )
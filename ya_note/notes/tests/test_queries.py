@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ya_common.query_budget import QueryBudget
+
+from notes import bulk
+from notes.models import Note
+
+User = get_user_model()
+
+
+class TestQueryBudget(TestCase):
+    """Every notes view stays within its SQL query budget."""
+
+    FORM = {
+        'title': 'new title',
+        'text': 'new text',
+        'slug': 'new-slug'
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.note = Note.objects.create(
+            title='title', text='text', slug='slug', author=cls.author
+        )
+
+    def test_get_pages(self):
+        """Pages are rendered within their query budget."""
+        slug = (self.note.slug,)
+        pages = (
+            ('notes:home', None, self.client, 0),
+            ('notes:home', None, self.author_client, 2),
+            ('notes:success', None, self.author_client, 2),
+            ('notes:add', None, self.author_client, 2),
+            ('notes:list', None, self.author_client, 3),
+            ('notes:detail', slug, self.author_client, 4),
+            ('notes:edit', slug, self.author_client, 3),
+            ('notes:delete', slug, self.author_client, 3),
+        )
+        for name, args, client, queries in pages:
+            with self.subTest(name=name, queries=queries):
+                url = reverse(name, args=args)
+                with QueryBudget(f'GET {name}', queries):
+                    client.get(url)
+
+    def test_api_notes(self):
+        """API list and batch: session, user and one notes query."""
+        url = reverse('notes:api_notes')
+        for query in ({}, {'ids': self.note.pk}):
+            with self.subTest(query=query):
+                with QueryBudget('GET notes:api_notes', 3):
+                    self.author_client.get(url, query)
+
+    def test_create_note(self):
+        """Note creation: session, user, slug check, insert, index."""
+        with QueryBudget('POST notes:add', 7):
+            self.author_client.post(reverse('notes:add'), data=self.FORM)
+
+    def test_edit_note(self):
+        """Note edit: session, user, note, slug check, update, index."""
+        url = reverse('notes:edit', args=(self.note.slug,))
+        with QueryBudget('POST notes:edit', 8):
+            self.author_client.post(url, data=self.FORM)
+
+    @QueryBudget('POST notes:delete', 5)
+    def test_delete_note(self):
+        """Note deletion: session, user, note, delete, index."""
+        url = reverse('notes:delete', args=(self.note.slug,))
+        self.author_client.post(url)
+
+    def test_import_notes(self):
+        """Import queries per batch: slugs, insert, ids, index."""
+        records = [{'title': 'slug', 'text': 'text'}] * 50
+        with QueryBudget('import_notes', 7):
+            bulk.import_notes(records, self.author, batch_size=50)
+
+    def test_n_plus_one_is_detected(self):
+        """Repeated queries of the same shape fail the budget."""
+        Note.objects.bulk_create(
+            Note(title=f'note {index}', slug=f'note-{index}',
+                 author=self.author)
+            for index in range(5)
+        )
+        with self.assertRaisesRegex(AssertionError, 'N\\+1'):
+            with QueryBudget('N+1', max_repeats=2):
+                for note in Note.objects.all():
+                    note.author.username
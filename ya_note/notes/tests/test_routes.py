@@ -34,7 +34,10 @@ class TestRoutes(TestCase):
 
     def test_done_add_notes_pages_availability_for_login_user(self):
         """Notes pages availability for registered user."""
-        urls = ('notes:list', 'notes:success', 'notes:add')
+        urls = (
+            'notes:list', 'notes:success', 'notes:add', 'notes:search',
+            'notes:import', 'notes:export',
+        )
         for url in urls:
             with self.subTest(name=url):
                 response = self.author_client.get(reverse(url))
@@ -53,6 +56,31 @@ class TestRoutes(TestCase):
                     response = client.get(url)
                     self.assertEqual(response.status_code, status)
 
+    def test_note_detail_not_modified(self):
+        """Unchanged note answers conditional requests with 304."""
+        url = reverse('notes:detail', args=self.slug)
+        response = self.author_client.get(url)
+        conditions = (
+            {'HTTP_IF_NONE_MATCH': response['ETag']},
+            {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']},
+        )
+        for headers in conditions:
+            with self.subTest(headers=headers):
+                response = self.author_client.get(url, **headers)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+        self.note.save()
+        response = self.author_client.get(url, **conditions[0])
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_notes_list_invalid_cursor(self):
+        """Broken pagination cursor leads to 404."""
+        response = self.author_client.get(
+            reverse('notes:list'), {'cursor': 'broken'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
     def test_redirect_for_anonymous_client(self):
         """Redirect for anonymous user."""
         login_url = reverse('users:login')
@@ -60,6 +88,8 @@ class TestRoutes(TestCase):
             ('notes:list', None), ('notes:success', None),
             ('notes:add', None), ('notes:detail', self.slug),
             ('notes:edit', self.slug), ('notes:delete', self.slug),
+            ('notes:search', None), ('notes:import', None),
+            ('notes:export', None),
         )
         for name, args in urls:
             with self.subTest(name=name):
@@ -1,15 +1,30 @@
+from django.conf import settings
 from django.urls import path
 
-from notes import views
+from notes import api, views
 
 app_name = 'notes'
 
+if settings.ASYNC_VIEWS:
+    notes_list = views.notes_list
+else:
+    notes_list = views.NotesList.as_view()
+
 urlpatterns = [
     path('', views.Home.as_view(), name='home'),
     path('add/', views.NoteCreate.as_view(), name='add'),
     path('edit/<slug:slug>/', views.NoteUpdate.as_view(), name='edit'),
     path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
-    path('notes/', views.NotesList.as_view(), name='list'),
+    path('notes/', notes_list, name='list'),
+    path('search/', views.NoteSearch.as_view(), name='search'),
+    path('import/', views.NoteImport.as_view(), name='import'),
+    path('export/', views.NoteExport.as_view(), name='export'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
+    path('api/notes/', api.NoteResource.as_view(), name='api_notes'),
+    path(
+        'api/notes/<slug:slug>/',
+        api.NoteResource.as_view(),
+        name='api_note'
+    ),
 ]
@@ -1,9 +1,39 @@
+import csv
+import io
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.urls import reverse_lazy
 from django.views import generic
+from django.views.decorators.http import condition
+
+from ya_common.pagination import CursorPaginator, InvalidCursor
+from ya_common.search import ranked
+
+from . import bulk, search
+from .forms import WARNING, NoteForm, NoteImportForm
+from .models import Note, is_slug_conflict
+
+
+def note_updated(request, slug):
+    """Время изменения заметки, один запрос на оба валидатора."""
+    if not hasattr(request, 'note_updated'):
+        request.note_updated = Note.objects.filter(
+            author=request.user, slug=slug
+        ).values_list('updated', flat=True).first()
+    return request.note_updated
+
 
-from .forms import NoteForm
-from .models import Note
+def note_etag(request, slug):
+    updated = note_updated(request, slug)
+    if updated is None:
+        return None
+    return f'{slug}-{updated.timestamp()}'
 
 
 class Home(generic.TemplateView):
@@ -26,22 +56,39 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class NoteFormMixin:
+    """Форма заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        """
+        Указанный вручную slug могли занять между проверкой и записью.
+
+        Такой конфликт показываем как ошибку формы, а не как 500.
+        """
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            if not is_slug_conflict(
+                [form.instance.slug], exclude_pk=form.instance.pk
+            ):
+                raise
+            form.add_error('slug', form.instance.slug + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteBase, NoteFormMixin, generic.CreateView):
+    """Добавление заметки."""
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteBase, NoteFormMixin, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
@@ -53,7 +100,136 @@ class NotesList(NoteBase, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        """
+        Одна страница заметок, начиная с курсора.
+
+        Шаблону нужны только id, slug и title, текст заметок
+        не загружаем. Страница выбирается по индексу (author, id).
+        """
+        paginator = CursorPaginator(
+            super().get_queryset().only('id', 'slug', 'title'),
+            ('id',),
+            settings.NOTES_COUNT_ON_LIST_PAGE
+        )
+        try:
+            self.cursor_page = paginator.page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404('Некорректный курсор.')
+        return self.cursor_page.object_list
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['cursor_page'] = self.cursor_page
+        return context
+
+
+class NoteSearch(LoginRequiredMixin, generic.TemplateView):
+    """Поиск по заметкам пользователя через полнотекстовый индекс."""
+    template_name = 'notes/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        context['query'] = query
+        if query:
+            context['object_list'] = ranked(
+                Note.objects.filter(
+                    author=self.request.user
+                ).only('id', 'slug', 'title'),
+                search.get_index().search(
+                    query,
+                    owner_id=self.request.user.pk,
+                    limit=settings.SEARCH_RESULTS_COUNT
+                )
+            )
+        return context
+
+
+class NoteImport(LoginRequiredMixin, generic.FormView):
+    """Массовый импорт заметок из файла."""
+    template_name = 'notes/import.html'
+    form_class = NoteImportForm
+    success_url = reverse_lazy('notes:success')
+
+    def form_valid(self, form):
+        """Файл разбирается потоком и вставляется пачками, см. notes.bulk."""
+        stream = io.TextIOWrapper(
+            form.cleaned_data['file'], encoding='utf-8-sig', newline=''
+        )
+        try:
+            bulk.import_notes(
+                bulk.read_records(stream, form.cleaned_data['format']),
+                self.request.user
+            )
+        except (ValidationError, UnicodeDecodeError, csv.Error) as error:
+            form.add_error('file', getattr(error, 'messages', [str(error)]))
+            return self.form_invalid(form)
+        finally:
+            stream.detach()
+        return super().form_valid(form)
+
+
+class NoteExport(LoginRequiredMixin, generic.View):
+    """Выгрузка всех заметок пользователя потоком или файлом под ASGI."""
+    CONTENT_TYPES = {
+        'json': 'application/json',
+        'csv': 'text/csv',
+    }
+
+    def get(self, request, *args, **kwargs):
+        format = request.GET.get('format', 'json')
+        if format not in self.CONTENT_TYPES:
+            raise Http404('Неизвестный формат.')
+        chunks = bulk.export_notes(
+            Note.objects.filter(author=request.user), format
+        )
+        content_type = f'{self.CONTENT_TYPES[format]}; charset=utf-8'
+        if isinstance(request, ASGIRequest):
+            # ASGIHandler перебирает тело ответа в цикле событий, где
+            # ORM недоступен: выгрузка пишется в файл здесь, в потоке.
+            return FileResponse(
+                bulk.spool(chunks),
+                as_attachment=True,
+                filename=f'notes.{format}',
+                content_type=content_type,
+            )
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="notes.{format}"'
+        )
+        return response
+
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+    def get(self, request, *args, **kwargs):
+        """Неизменённую заметку не загружаем и не рендерим: отвечаем 304."""
+        return condition(
+            etag_func=note_etag, last_modified_func=note_updated
+        )(super().get)(request, *args, **kwargs)
+
+
+async def notes_list(request):
+    """
+    Асинхронный NotesList для ASGI (ASYNC_VIEWS, см. urls.py).
+
+    ORM в Django 3.2 только синхронный: пользователь и страница
+    заметок загружаются одним переходом в поток, шаблон рендерится
+    в цикле событий.
+    """
+    view = NotesList()
+    view.setup(request)
+
+    def load_context():
+        if not request.user.is_authenticated:
+            return None
+        view.object_list = view.get_queryset()
+        return view.get_context_data()
+
+    context = await sync_to_async(load_context)()
+    if context is None:
+        return view.handle_no_permission()
+    return view.render_to_response(context).render()
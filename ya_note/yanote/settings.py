@@ -1,9 +1,17 @@
+import os
+import sys
+import tempfile
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Общий для двух проектов пакет ya_common лежит в корне репозитория.
+if str(BASE_DIR.parent) not in sys.path:
+    sys.path.append(str(BASE_DIR.parent))
+
 SECRET_KEY = 'django-insecure-yipnj$#j!ajarq%k55z4kuf3x79)91h0h42o9!1ho(z=!%mt=#'
 
 DEBUG = False
@@ -23,6 +31,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'ya_common.sqlite.SerializedWritesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -56,6 +65,14 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Файловая тестовая база: в общей in-memory базе SQLite
+        # параллельные записи из потоков падают с «table is locked».
+        # Параллельный режим run_tests.sh даёт каждому процессу свой файл.
+        'TEST': {
+            'NAME': os.environ.get(
+                'TEST_DATABASE_NAME', BASE_DIR / 'test_db.sqlite3'
+            ),
+        },
     }
 }
 
@@ -87,3 +104,68 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_LIST_PAGE = 50
+
+SEARCH_RESULTS_COUNT = 20
+
+# PRAGMA для каждого нового соединения с SQLite (см. signals.py):
+# WAL, чтобы чтение не ждало записи, и ожидание блокировки вместо
+# немедленной ошибки «database is locked».
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,
+    'temp_store': 'memory',
+}
+
+# Записи из потоков процесса идут в SQLite по одной (см. ya_common/sqlite.py).
+SQLITE_WRITE_QUEUE = os.environ.get('DJANGO_SQLITE_WRITE_QUEUE') == '1'
+
+# Асинхронные представления для чтения (см. urls.py); asgi.py
+# включает их сам, под WSGI остаются синхронные.
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS') == '1'
+
+# Профиль для боевого запуска: DJANGO_PROFILE=production.
+if os.environ.get('DJANGO_PROFILE') == 'production':
+    DEBUG = os.environ.get('DJANGO_DEBUG') == '1'
+    SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY')
+    if not SECRET_KEY:
+        raise ImproperlyConfigured('Задайте DJANGO_SECRET_KEY.')
+    ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost').split(',')
+
+    # Соединение живёт между запросами вместо открытия на каждый.
+    DATABASES['default']['CONN_MAX_AGE'] = int(
+        os.environ.get('DJANGO_CONN_MAX_AGE', 600)
+    )
+    SQLITE_PRAGMAS['busy_timeout'] = 20000
+
+    # Общий для процессов кэш: на нём держатся версии закэшированных
+    # данных, поэтому locmem подходит только для одного процесса.
+    CACHES = {
+        'default': {
+            'BACKEND': os.environ.get(
+                'DJANGO_CACHE_BACKEND',
+                'django.core.cache.backends.filebased.FileBasedCache',
+            ),
+            'LOCATION': os.environ.get(
+                'DJANGO_CACHE_LOCATION',
+                str(Path(tempfile.gettempdir()) / 'yanote-cache'),
+            ),
+        }
+    }
+    # Сессия читается из кэша, в базу — только при записи.
+    # django.contrib.sessions.backends.signed_cookies обходится без неё.
+    SESSION_ENGINE = os.environ.get(
+        'DJANGO_SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db'
+    )
+
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]